@@ -1,5 +1,5 @@
-import httpx
 from fastapi import HTTPException, Header
+from app.shared.http_clients import get_client
 from dotenv import load_dotenv
 import os
 
@@ -12,16 +12,15 @@ async def verify_user(authorization: str = Header(...)):
 
     token = authorization.split(" ")[1]
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            "https://api.clerk.dev/v1/me",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Clerk-Secret-Key": CLERK_API_KEY,
-            }
-        )
-        if resp.status_code != 200:
-            raise HTTPException(status_code=401, detail="Authentication failed")
+    resp = await get_client("clerk").get(
+        "https://api.clerk.dev/v1/me",
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Clerk-Secret-Key": CLERK_API_KEY,
+        }
+    )
+    if resp.status_code != 200:
+        raise HTTPException(status_code=401, detail="Authentication failed")
 
-        user_data = resp.json()
-        return user_data["id"]
+    user_data = resp.json()
+    return user_data["id"]
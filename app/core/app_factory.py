@@ -1,12 +1,19 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.middlewares.auth import AuthMiddleware
 from app.middlewares.request_logger import LoggingMiddleware
 from app.middlewares.rate_limiter import RateLimiterMiddleware
 from app.middlewares.request_id import RequestIdMiddleware
+from app.middlewares.deadline import DeadlineMiddleware
 from app.middlewares.error_handler import app_exception_handler
 from app.shared.exceptions import AppException
+from app.shared.dependencies import get_internal_service_user
+from app.shared import metrics
+from app.shared.http_clients import close_clients
+from app.shared.shared_cache import prune_periodically
 from app.core.logger import setup_logging
 from dotenv import load_dotenv
 load_dotenv()
@@ -15,6 +22,15 @@ import os
 
 IS_RUNNING_LOCAL = os.getenv("IS_RUNNING_LOCAL") == "true"
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pruning = asyncio.create_task(prune_periodically())
+    yield
+    pruning.cancel()
+    await close_clients()
+
+
 def create_app(
     title: str = "API",
     version: str = "0.1",
@@ -23,9 +39,10 @@ def create_app(
     with_middlewares: bool = True
 ) -> FastAPI:
     setup_logging()
-    app = FastAPI(title=title, version=version)
+    app = FastAPI(title=title, version=version, lifespan=lifespan)
 
     if with_middlewares:
+        app.add_middleware(DeadlineMiddleware)
         app.add_middleware(RequestIdMiddleware)
         app.add_middleware(AuthMiddleware)
         app.add_middleware(LoggingMiddleware)
@@ -45,6 +62,10 @@ def create_app(
     def health_check():
         return {"status": "ok"}
 
+    @app.get("/internal/metrics")
+    def metrics_snapshot(identity=Depends(get_internal_service_user())):
+        return metrics.snapshot()
+
     if routers:
         for router in routers:
             app.include_router(router)
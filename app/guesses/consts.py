@@ -1,2 +1,71 @@
+import os
+import tempfile
+
 MAX_DAILY_GUESSES_FREE_USER = 5
-MAX_DAILY_GUESSES_PREMIUM = 30
\ No newline at end of file
+MAX_DAILY_GUESSES_PREMIUM = 30
+
+# Embedding backend: "openai" (text-embedding-3-small) or "local" (offline hashing vectors)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIM = 1536
+EMBED_LOCAL_DIM = int(os.getenv("EMBED_LOCAL_DIM", "1024"))
+
+# Micro-batching of concurrent embedding requests (0 ms disables the window)
+EMBED_COALESCE_WINDOW_MS = float(os.getenv("EMBED_COALESCE_WINDOW_MS", "10"))
+EMBED_COALESCE_MAX_BATCH = int(os.getenv("EMBED_COALESCE_MAX_BATCH", "64"))
+
+# Embedding cache: in-memory LRU in front of a host-shared memory-mapped file
+EMBED_CACHE_MEMORY_SIZE = int(os.getenv("EMBED_CACHE_MEMORY_SIZE", "4096"))
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", os.path.join(tempfile.gettempdir(), "guess_song_embeddings"))
+EMBED_CACHE_DISK_MAX_ROWS = int(os.getenv("EMBED_CACHE_DISK_MAX_ROWS", "20000"))
+
+# Upper bound for one shared scoring pass (all concurrent identical guesses wait on it)
+SCORING_TIMEOUT_SECONDS = float(os.getenv("SCORING_TIMEOUT_SECONDS", "15"))
+
+# Tiered scoring bands: the embeddings tier resolves a guess without the LLM when
+# it is clearly unrelated (far edit distances and every similarity below the max)
+# or clearly near (combo similarity at or above the min). A near guess gets the
+# embedding base score (at most 850), without the LLM nudge that would usually lift
+# it, so this band trades some score for skipped LLM calls. Set the min above 1 to disable.
+SCORING_UNRELATED_MAX_SIM = float(os.getenv("SCORING_UNRELATED_MAX_SIM", "0.12"))
+SCORING_UNRELATED_MIN_EDIT_DIST = float(os.getenv("SCORING_UNRELATED_MIN_EDIT_DIST", "0.35"))
+SCORING_NEAR_MIN_SIM = float(os.getenv("SCORING_NEAR_MIN_SIM", "0.90"))
+
+# LLM calls: per-call deadline and adaptive (AIMD) concurrency limit. Guesses that
+# cannot get a slot in time (or whose call fails) fall back to the embedding-only score.
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "4"))
+LLM_INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "8"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LLM_LATENCY_TARGET_MS = float(os.getenv("LLM_LATENCY_TARGET_MS", "2500"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "1"))
+
+# Per-guess scoring deadline (shared by every tier); the LLM and embedding calls
+# bound their own timeouts by what is left of it
+SCORING_DEADLINE_SECONDS = float(os.getenv("SCORING_DEADLINE_SECONDS", "8"))
+EMBED_REQUEST_TIMEOUT_SECONDS = float(os.getenv("EMBED_REQUEST_TIMEOUT_SECONDS", "5"))
+
+# Hedged OpenAI requests: a second identical request is sent when the first has not
+# answered after the given percentile of recent latencies (initial delay until enough samples)
+OPENAI_HEDGE_ENABLED = os.getenv("OPENAI_HEDGE_ENABLED", "true").lower() == "true"
+OPENAI_HEDGE_PERCENTILE = float(os.getenv("OPENAI_HEDGE_PERCENTILE", "0.95"))
+OPENAI_HEDGE_MIN_DELAY_MS = float(os.getenv("OPENAI_HEDGE_MIN_DELAY_MS", "50"))
+OPENAI_HEDGE_INITIAL_DELAY_MS = float(os.getenv("OPENAI_HEDGE_INITIAL_DELAY_MS", "1000"))
+
+# Per-worker cache of today's scores by (song id, normalized guess): LRU-evicted
+# past either bound, entries expire at the next UTC midnight
+GUESS_SCORE_CACHE_MAX_ENTRIES = int(os.getenv("GUESS_SCORE_CACHE_MAX_ENTRIES", "50000"))
+GUESS_SCORE_CACHE_MAX_BYTES = int(os.getenv("GUESS_SCORE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Score cache warm-up when a new daily song is picked: the most frequent guesses of
+# the last few days plus catalog titles/artists are scored before players send them
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_LOOKBACK_DAYS = int(os.getenv("WARMUP_LOOKBACK_DAYS", "14"))
+WARMUP_MAX_SCANNED_GUESSES = int(os.getenv("WARMUP_MAX_SCANNED_GUESSES", "20000"))
+WARMUP_TOP_GUESSES = int(os.getenv("WARMUP_TOP_GUESSES", "300"))
+WARMUP_MAX_CATALOG_GUESSES = int(os.getenv("WARMUP_MAX_CATALOG_GUESSES", "500"))
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "4"))
+
+# Internal batch scoring endpoint
+BATCH_SCORE_MAX_GUESSES = int(os.getenv("BATCH_SCORE_MAX_GUESSES", "500"))
+BATCH_SCORE_CONCURRENCY = int(os.getenv("BATCH_SCORE_CONCURRENCY", "8"))
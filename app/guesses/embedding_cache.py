@@ -0,0 +1,181 @@
+"""
+Two-tier embedding cache. Vectors are stored unit-normalized float32.
+
+L1 is a per-process LRU. L2 is an append-only file of fixed-size records
+(sha1 key + float32 vector) that is memory-mapped by every worker on the
+host, so a vector embedded by one worker is a disk hit for the others and
+survives restarts. Appends are serialized with an advisory file lock.
+A full file is replaced by a fresh one, never truncated in place.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+import structlog
+from app.shared import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: single worker, no cross-process lock needed
+    fcntl = None
+
+logger = structlog.get_logger()
+
+_KEY_BYTES = 20
+
+
+def unit_vector(vector) -> np.ndarray:
+    """Contiguous float32 copy scaled to length 1, so cosine is a plain dot product."""
+    vec = np.ascontiguousarray(vector, dtype=np.float32)
+    n = np.linalg.norm(vec)
+    return vec / n if n else vec
+
+
+def cache_key_text(text: str) -> str:
+    """Case and whitespace insensitive form of `text`; this is what gets embedded."""
+    return " ".join((text or "").lower().split())
+
+
+class _DiskTier:
+    """
+    The file is only ever appended to, never shrunk: other workers have it
+    memory-mapped, and touching a mapped page past the end of a truncated
+    file kills the process (SIGBUS). When it is full, a new empty file
+    replaces it under the same name (a new inode). Workers notice the inode
+    change on their next miss and map the new file; until then their old
+    mapping stays readable.
+    """
+    def __init__(self, path: str, dim: int, max_rows: int):
+        self.path = path
+        self.max_rows = max_rows
+        self._lock_path = f"{path}.lock"
+        self._dtype = np.dtype([("key", f"S{_KEY_BYTES}"), ("vec", "<f4", (dim,))])
+        self._mm = None
+        self._ino = None
+        self._rows = 0
+        self._index: Dict[bytes, int] = {}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "ab").close()
+
+    def _sync(self):
+        """Maps rows appended by other workers (or the file that replaced a full one)."""
+        st = os.stat(self.path)
+        if st.st_ino == self._ino and st.st_size // self._dtype.itemsize == self._rows:
+            return
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            rows = st.st_size // self._dtype.itemsize
+            if st.st_ino != self._ino:
+                self._ino = st.st_ino
+                self._index = {}
+                self._rows = 0
+            self._mm = np.memmap(f, dtype=self._dtype, mode="r", shape=(rows,)) if rows else None
+        if self._mm is not None:
+            for i, key in enumerate(self._mm["key"][self._rows:rows], start=self._rows):
+                self._index[bytes(key)] = i
+        self._rows = rows
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        row = self._index.get(key)
+        if row is None:
+            self._sync()
+            row = self._index.get(key)
+        if row is None:
+            return None
+        return np.array(self._mm["vec"][row], dtype=np.float32)
+
+    def put_many(self, items: Dict[bytes, np.ndarray]):
+        # A separate lock file: the data file itself is swapped out on rotation
+        with open(self._lock_path, "ab") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                rows = os.path.getsize(self.path) // self._dtype.itemsize
+                if rows >= self.max_rows:
+                    # Bounded: start a new file rather than grow without limit
+                    logger.info("Embedding disk cache full, starting a new file", path=self.path, rows=rows)
+                    tmp = f"{self.path}.{os.getpid()}.tmp"
+                    open(tmp, "wb").close()
+                    os.replace(tmp, self.path)
+                with open(self.path, "r+b") as f:
+                    size = os.fstat(f.fileno()).st_size
+                    if size % self._dtype.itemsize:
+                        # Torn tail record of a crashed writer; whole rows are never removed
+                        f.truncate(size - size % self._dtype.itemsize)
+                    self._sync()
+                    fresh = [(k, v) for k, v in items.items() if k not in self._index]
+                    if not fresh:
+                        return
+                    records = np.empty(len(fresh), dtype=self._dtype)
+                    for i, (k, v) in enumerate(fresh):
+                        records[i]["key"] = k
+                        records[i]["vec"] = v
+                    f.seek(0, os.SEEK_END)
+                    f.write(records.tobytes())
+                    f.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        self._sync()
+
+
+class EmbeddingCache:
+    def __init__(self, model: str, dim: int, memory_size: int, disk_dir: Optional[str], disk_max_rows: int):
+        self.model = model
+        self.dim = dim
+        self.memory_size = memory_size
+        self._lru: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._disk = None
+        if disk_dir:
+            try:
+                self._disk = _DiskTier(os.path.join(disk_dir, f"{model}-{dim}.unit.f32"), dim, disk_max_rows)
+            except OSError as e:
+                logger.error("Embedding disk cache unavailable", dir=disk_dir, error=repr(e))
+
+    def _key(self, key_text: str) -> bytes:
+        return hashlib.sha1(f"{self.model}\x00{key_text}".encode("utf-8")).digest()
+
+    def _remember(self, key: bytes, vec: np.ndarray):
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.memory_size:
+            self._lru.popitem(last=False)
+
+    def get(self, key_text: str) -> Optional[np.ndarray]:
+        key = self._key(key_text)
+        vec = self._lru.get(key)
+        if vec is not None:
+            self._lru.move_to_end(key)
+            metrics.counter("embeddings.cache.memory_hits").inc()
+            return vec
+        if self._disk is not None:
+            try:
+                vec = self._disk.get(key)
+            except (OSError, ValueError) as e:
+                logger.error("Embedding disk cache read failed", error=repr(e))
+                vec = None
+            if vec is not None:
+                self._remember(key, vec)
+                metrics.counter("embeddings.cache.disk_hits").inc()
+                return vec
+        metrics.counter("embeddings.cache.misses").inc()
+        return None
+
+    def put_many(self, key_texts: List[str], vectors: List[List[float]]) -> List[np.ndarray]:
+        stored = []
+        fresh: Dict[bytes, np.ndarray] = {}
+        for key_text, vector in zip(key_texts, vectors):
+            vec = unit_vector(vector)
+            key = self._key(key_text)
+            self._remember(key, vec)
+            if vec.shape == (self.dim,):
+                fresh[key] = vec
+            stored.append(vec)
+        if self._disk is not None and fresh:
+            try:
+                self._disk.put_many(fresh)
+            except OSError as e:
+                logger.error("Embedding disk cache write failed", error=repr(e))
+        return stored
@@ -0,0 +1,192 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+import zlib
+import numpy as np
+from typing import Awaitable, Callable, List, Tuple
+from app.shared import metrics, deadline
+from app.shared.hedging import Hedger
+from app.shared.openai_client import client
+from .consts import (
+    EMBEDDING_MODEL,
+    EMBEDDING_DIM,
+    EMBED_COALESCE_WINDOW_MS,
+    EMBED_COALESCE_MAX_BATCH,
+    EMBED_CACHE_MEMORY_SIZE,
+    EMBED_CACHE_DIR,
+    EMBED_CACHE_DISK_MAX_ROWS,
+    EMBEDDING_BACKEND,
+    EMBED_LOCAL_DIM,
+    EMBED_REQUEST_TIMEOUT_SECONDS,
+    OPENAI_HEDGE_ENABLED,
+    OPENAI_HEDGE_PERCENTILE,
+    OPENAI_HEDGE_MIN_DELAY_MS,
+    OPENAI_HEDGE_INITIAL_DELAY_MS,
+)
+from .embedding_cache import EmbeddingCache, cache_key_text, unit_vector
+
+EmbedBatchFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingCoalescer:
+    """
+    Collects embedding requests that arrive within a short window (or until
+    `max_batch` texts are pending) and sends them as one batched call, then
+    fans the vectors back out to the awaiting coroutines.
+    """
+    def __init__(self, embed_batch: EmbedBatchFn, window_ms: float, max_batch: int):
+        self._embed_batch = embed_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending: List[Tuple[List[str], asyncio.Future, float]] = []
+        self._pending_texts = 0
+        self._timer = None
+        self._tasks = set()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if self.window <= 0:
+            return await self._embed_batch(texts)
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((list(texts), fut, time.perf_counter()))
+        self._pending_texts += len(texts)
+
+        if self._pending_texts >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_texts = self._pending, [], 0
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[List[str], asyncio.Future, float]]):
+        flushed_at = time.perf_counter()
+        # Identical texts from different guesses are only sent once
+        unique = list(dict.fromkeys(t for texts, _, _ in batch for t in texts))
+
+        metrics.counter("embeddings.coalescer.batches").inc()
+        metrics.histogram("embeddings.coalescer.batch_size").observe(len(unique))
+        metrics.histogram("embeddings.coalescer.requests_per_batch").observe(len(batch))
+        for _, _, enqueued_at in batch:
+            metrics.histogram("embeddings.coalescer.wait_ms").observe((flushed_at - enqueued_at) * 1000)
+
+        try:
+            vectors = await self._embed_batch(unique)
+        except Exception as e:
+            for _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        by_text = dict(zip(unique, vectors))
+        for texts, fut, _ in batch:
+            if not fut.done():
+                fut.set_result([by_text[t] for t in texts])
+
+
+class EmbeddingBackend(ABC):
+    """
+    Turns texts into vectors. `remote` backends pay a network round trip per
+    call, so their requests are cached and coalesced; local ones are called directly.
+    """
+    model: str
+    dim: int
+    remote: bool = True
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    def __init__(self, model: str = EMBEDDING_MODEL, dim: int = EMBEDDING_DIM):
+        self.model = model
+        self.dim = dim
+        self.hedger = Hedger(
+            "embeddings",
+            percentile=OPENAI_HEDGE_PERCENTILE,
+            min_delay_ms=OPENAI_HEDGE_MIN_DELAY_MS,
+            initial_delay_ms=OPENAI_HEDGE_INITIAL_DELAY_MS,
+            enabled=OPENAI_HEDGE_ENABLED,
+        )
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        # text-embedding-3-small is cheap and good for this task.
+        # The batch is shared by several guesses, so it gets its own timeout
+        # rather than the deadline of whichever guess happened to flush it.
+        resp = await self.hedger.call(
+            lambda: client.embeddings.create(model=self.model, input=texts),
+            timeout=EMBED_REQUEST_TIMEOUT_SECONDS,
+        )
+        return [d.embedding for d in resp.data]
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Offline CPU backend: signed feature hashing of character n-grams
+    (word-boundary padded) into a fixed-size vector. No network, no model
+    files, deterministic across processes. It captures spelling overlap,
+    not meaning, so it is a fallback/benchmark backend rather than a
+    drop-in replacement for the semantic signal.
+    """
+    remote = False
+
+    def __init__(self, dim: int = 1024, ngram_sizes: Tuple[int, ...] = (2, 3, 4)):
+        self.model = f"local-char-ngram-hash-{'-'.join(map(str, ngram_sizes))}"
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            padded = f" {word} "
+            for n in self.ngram_sizes:
+                for i in range(len(padded) - n + 1):
+                    h = zlib.crc32(padded[i:i + n].encode("utf-8"))
+                    vec[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return vec
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(t) for t in texts]
+
+
+def make_backend(name: str) -> EmbeddingBackend:
+    if name == "openai":
+        return OpenAIEmbeddingBackend()
+    if name == "local":
+        return HashingEmbeddingBackend(EMBED_LOCAL_DIM)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {name!r} (expected 'openai' or 'local')")
+
+
+backend = make_backend(EMBEDDING_BACKEND)
+coalescer = EmbeddingCoalescer(backend.embed, EMBED_COALESCE_WINDOW_MS, EMBED_COALESCE_MAX_BATCH)
+cache = EmbeddingCache(backend.model, backend.dim, EMBED_CACHE_MEMORY_SIZE, EMBED_CACHE_DIR, EMBED_CACHE_DISK_MAX_ROWS) if backend.remote else None
+
+
+async def embed_texts(texts: List[str]) -> List[np.ndarray]:
+    """
+    Embeds `texts`, serving repeats from the cache and coalescing the misses.
+    Raises asyncio.TimeoutError when the current deadline passes first.
+    """
+    keys = [cache_key_text(t) for t in texts]
+    if not backend.remote:
+        return [unit_vector(v) for v in await backend.embed(keys)]
+
+    found = {k: cache.get(k) for k in dict.fromkeys(keys)}
+    missing = [k for k, vec in found.items() if vec is None]
+    if missing:
+        vectors = await asyncio.wait_for(coalescer.embed(missing), deadline.remaining())
+        found.update(zip(missing, cache.put_many(missing, vectors)))
+    return [found[k] for k in keys]
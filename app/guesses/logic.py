@@ -1,34 +1,64 @@
-import os, re, json, math, unicodedata
-from functools import lru_cache
-from typing import Dict, Tuple, List
+import re, json, time
+import asyncio
+import structlog
+import numpy as np
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Tuple, List, Optional, Sequence, FrozenSet
+from rapidfuzz import process
 from rapidfuzz.distance import Levenshtein
-from openai import AsyncOpenAI
-
-# ========== OpenAI client ==========
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from app.shared.openai_client import client
+from app.shared import metrics
+from app.shared.timing import timed_stage
+from .embeddings import embed_texts
+from .normalizer import normalize
+from app.shared import deadline
+from app.shared.concurrency import AdaptiveConcurrencyLimiter
+from app.shared.hedging import Hedger
+from app.shared.exceptions import ConcurrencyLimitExceededException
+from .consts import (
+    SCORING_UNRELATED_MAX_SIM,
+    SCORING_UNRELATED_MIN_EDIT_DIST,
+    SCORING_NEAR_MIN_SIM,
+    LLM_TIMEOUT_SECONDS,
+    LLM_INITIAL_CONCURRENCY,
+    LLM_MAX_CONCURRENCY,
+    LLM_LATENCY_TARGET_MS,
+    LLM_MAX_QUEUE,
+    LLM_QUEUE_TIMEOUT_SECONDS,
+    SCORING_DEADLINE_SECONDS,
+    OPENAI_HEDGE_ENABLED,
+    OPENAI_HEDGE_PERCENTILE,
+    OPENAI_HEDGE_MIN_DELAY_MS,
+    OPENAI_HEDGE_INITIAL_DELAY_MS,
+)
+
+logger = structlog.get_logger()
+
+_llm_limiter = AdaptiveConcurrencyLimiter(
+    "llm",
+    initial_limit=LLM_INITIAL_CONCURRENCY,
+    max_limit=LLM_MAX_CONCURRENCY,
+    latency_target_ms=LLM_LATENCY_TARGET_MS,
+    max_queue=LLM_MAX_QUEUE,
+)
+# Set for background scoring (cache warm-up), which must not compete with players for the LLM
+_background_scoring: ContextVar[bool] = ContextVar("background_scoring", default=False)
+_llm_hedger = Hedger(
+    "llm",
+    percentile=OPENAI_HEDGE_PERCENTILE,
+    min_delay_ms=OPENAI_HEDGE_MIN_DELAY_MS,
+    initial_delay_ms=OPENAI_HEDGE_INITIAL_DELAY_MS,
+    enabled=OPENAI_HEDGE_ENABLED,
+)
 
 # ========== Text utils ==========
 _WORD_SEP = re.compile(r"[-–—|:/]+")
 _BY_SPLIT = re.compile(r"\bby\b", re.IGNORECASE)
 
-def _ascii_fold(s: str) -> str:
-    # strip accents but keep letters/numbers
-    s = unicodedata.normalize("NFKD", s)
-    return "".join(ch for ch in s if not unicodedata.combining(ch))
-
 def norm(s: str) -> str:
-    if not s:
-        return ""
-    s = _ascii_fold(s).lower()
-    # remove parens/brackets content (remaster, live, feat, etc.)
-    s = re.sub(r"\(.*?\)|\[.*?\]", " ", s)
-    s = re.sub(r"\b(remaster(?:ed)?|live|acoustic|feat\.?|ft\.?|version|edit|mix|rmx)\b", " ", s)
-    # normalize &, and
-    s = re.sub(r"\b(&|and)\b", " and ", s)
-    # collapse punctuation to spaces
-    s = re.sub(r"[^a-z0-9\s]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    return normalize(s)
 
 def nlev(a: str, b: str) -> float:
     """Normalized edit distance: 0=identical, 1=different."""
@@ -36,13 +66,33 @@ def nlev(a: str, b: str) -> float:
         return 1.0
     return Levenshtein.normalized_distance(a, b)
 
-def _token_set_ratio(a: str, b: str) -> float:
+def _token_overlap(tokens_a: FrozenSet[str], tokens_b: FrozenSet[str]) -> float:
     """Very simple token overlap (0..1)."""
-    A, B = set(a.split()), set(b.split())
-    if not A or not B:
+    if not tokens_a or not tokens_b:
         return 0.0
-    inter = len(A & B)
-    return inter / max(len(A), len(B))
+    return len(tokens_a & tokens_b) / max(len(tokens_a), len(tokens_b))
+
+def _match_candidates(candidates: Sequence[str], refs: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For each candidate, the best (lowest) normalized edit distance and best
+    token overlap against any reference string. Edit distances for all
+    unique candidates come from one rapidfuzz cdist call; empty strings
+    never match (distance 1, overlap 0), like nlev.
+    """
+    uniq = list(dict.fromkeys(candidates))
+    refs = [r for r in refs if r] or [""]
+    dist = process.cdist(uniq, refs, scorer=Levenshtein.normalized_distance, dtype=np.float64)
+    dist[[not c for c in uniq], :] = 1.0
+    dist[:, [not r for r in refs]] = 1.0
+
+    ref_tokens = [frozenset(r.split()) for r in refs]
+    overlap = np.array(
+        [max(_token_overlap(frozenset(c.split()), rt) for rt in ref_tokens) for c in uniq]
+    )
+
+    row = {c: i for i, c in enumerate(uniq)}
+    idx = [row[c] for c in candidates]
+    return dist.min(axis=1)[idx], overlap[idx]
 
 def _candidate_splits(guess_norm: str) -> List[Tuple[str, str]]:
     """
@@ -83,91 +133,143 @@ def _candidate_splits(guess_norm: str) -> List[Tuple[str, str]]:
     return uniq
 
 # ========== Embeddings helpers ==========
-def _cos(a: List[float], b: List[float]) -> float:
-    dot = sum(x*y for x, y in zip(a, b))
-    na = math.sqrt(sum(x*x for x in a)) or 1.0
-    nb = math.sqrt(sum(x*x for x in b)) or 1.0
-    return dot / (na * nb)
-
-@lru_cache(maxsize=4096)
-def _embed_cache(key: str) -> Tuple[float, ...]:
-    # LRU cache per text to reduce calls; tuple for hashability
-    raise RuntimeError("embed cache should be filled by async wrapper")
-
-async def _embed_texts(texts: List[str]) -> List[List[float]]:
-    # text-embedding-3-small is cheap and good for this task
-    resp = await client.embeddings.create(model="text-embedding-3-small", input=texts)
-    return [d.embedding for d in resp.data]
-
-async def _embed_with_cache(text: str) -> List[float]:
-    # Try cache; if missing, compute and backfill via monkey-patch
-    try:
-        tup = _embed_cache(text)  # type: ignore
-        return list(tup)
-    except Exception:
-        vec = (await _embed_texts([text]))[0]
-        # monkey fill the cache
-        def _store(k: str, v: Tuple[float, ...]):
-            _embed_cache.__wrapped__.cache[k] = v  # type: ignore
-        _store(text, tuple(vec))
-        return vec
+def _cosine_sims(guess_vecs: np.ndarray, refs: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of each guess vector against each reference row as one
+    matrix product. Vectors are unit-normalized when they enter the cache.
+    Accepts a single vector (returns shape (R,)) or a batch (returns (N, R)).
+    """
+    return guess_vecs @ refs.T
 
-# ========== Main scoring ==========
+async def _embed_texts(texts: List[str]) -> List[np.ndarray]:
+    # Cached per normalized text; misses are coalesced into one batched call
+    return await embed_texts(texts)
 
-async def get_similarity_score(guess: str, correct: Dict[str, str]) -> int:
+# ========== Per-day song context ==========
+@dataclass
+class SongScoringContext:
     """
-    Returns an int in [0, 1000].
-    Hard rules:
-      - 1000 only if the SONG TITLE matches (minor typos allowed).
-      - Correct artist but wrong/unspecified title => high (≈900–980), but never 1000.
-      - Far guesses => low.
-    Uses: deterministic checks -> embeddings -> one LLM 'nudge' with strict JSON.
+    Everything about the daily song that does not depend on the guess.
+    Built once when the daily song is resolved and reused for every guess,
+    so scoring only has to embed the guess text itself.
     """
-    title_raw = correct.get("title", "") or ""
-    artist_raw = correct.get("artist", "") or ""
-    guess_raw = guess or ""
+    song_id: Optional[str]
+    title: str
+    artist: str
+    n_title: str
+    n_artist: str
+    # Normalized title/artist plus their known aliases, for fuzzy matching
+    title_refs: Tuple[str, ...] = ()
+    artist_refs: Tuple[str, ...] = ()
+    # Exact-match index: normalized and space-less forms of every title alias
+    title_keys: FrozenSet[str] = frozenset()
+    # Rows: "title by artist", artist, title (see reference_texts)
+    reference_vectors: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_song(cls, song: Dict[str, str]) -> "SongScoringContext":
+        title = song.get("title", "") or ""
+        artist = song.get("artist", "") or ""
+        n_title, n_artist = norm(title), norm(artist)
+        title_refs = _alias_refs(n_title, song.get("aliases"))
+        return cls(
+            song_id=song.get("id"),
+            title=title,
+            artist=artist,
+            n_title=n_title,
+            n_artist=n_artist,
+            title_refs=title_refs,
+            artist_refs=_alias_refs(n_artist, song.get("artist_aliases")),
+            title_keys=frozenset(k for ref in title_refs for k in _alias_keys(ref)),
+        )
 
-    n_title = norm(title_raw)
-    n_artist = norm(artist_raw)
-    n_both = (n_title + " " + n_artist).strip()
-    n_guess = norm(guess_raw)
+    @property
+    def reference_texts(self) -> List[str]:
+        # "title by artist", artist, title
+        return [f"{self.title} by {self.artist}".strip(), self.artist, self.title]
+
+    @property
+    def has_vectors(self) -> bool:
+        return self.reference_vectors is not None
+
+def _alias_refs(n_main: str, aliases: Optional[List[str]]) -> Tuple[str, ...]:
+    refs = [n_main] + [norm(a) for a in (aliases or [])]
+    return tuple(dict.fromkeys(r for r in refs if r)) or (n_main,)
+
+def _alias_keys(n_text: str) -> Tuple[str, ...]:
+    # "dont stop me now" and "don t stop me now" share the space-less key
+    return (n_text, n_text.replace(" ", ""))
+
+async def build_song_context(song: Dict[str, str]) -> SongScoringContext:
+    """Normalize the song and embed its reference strings once."""
+    ctx = SongScoringContext.from_song(song)
+    ctx.reference_vectors = np.stack(await _embed_texts(ctx.reference_texts))
+    return ctx
+
+# ========== Scoring tiers ==========
+# alias lookup -> deterministic -> embeddings -> LLM. Each tier either returns
+# a final score (it is confident) or hands its signals to the next one.
+
+@dataclass
+class _DeterministicSignals:
+    best_title_dist: float
+    best_artist_dist: float
+    saw_title_exact: bool
+    saw_artist_exact: bool
+
+@dataclass
+class _EmbeddingSignals:
+    s_combo: float
+    s_artist: float
+    s_title: float
+    base_score: int
+
+def _deterministic_signals(n_guess: str, title_refs: Sequence[str], artist_refs: Sequence[str]) -> _DeterministicSignals:
+    """
+    Scores every (title, artist) interpretation of the guess against the
+    normalized reference titles/artists in one batched pass.
+    """
+    splits = _candidate_splits(n_guess)
+    title_dist, title_overlap = _match_candidates([t for t, _ in splits], title_refs)
+    artist_dist, artist_overlap = _match_candidates([a for _, a in splits], artist_refs)
+
+    return _DeterministicSignals(
+        best_title_dist=float(title_dist.min()),
+        best_artist_dist=float(artist_dist.min()),
+        saw_title_exact=bool(((title_dist <= 0.08) | (title_overlap >= 0.95)).any()),
+        saw_artist_exact=bool(((artist_dist <= 0.08) | (artist_overlap >= 0.95)).any()),
+    )
 
-    # ---------- 1) Deterministic fast paths ----------
-    best_exact = 0
-    best_title_dist, best_artist_dist = 1.0, 1.0
-    saw_artist_exact = False
-    saw_title_exact = False
-
-    for g_title, g_artist in _candidate_splits(n_guess):
-        td = nlev(g_title, n_title)
-        ad = nlev(g_artist, n_artist)
-        saw_title_exact |= (td <= 0.08) or (_token_set_ratio(g_title, n_title) >= 0.95)
-        saw_artist_exact |= (ad <= 0.08) or (_token_set_ratio(g_artist, n_artist) >= 0.95)
-
-        # Exact song (title) wins everything (artist may be omitted or wrong in user text)
-        if td <= 0.08 or (_token_set_ratio(g_title, n_title) >= 0.98):
-            # If artist is also very close, it's trivially 1000
-            if ad <= 0.12 or g_artist == "" or _token_set_ratio(g_artist, n_artist) >= 0.9:
-                return 1000
-            best_exact = max(best_exact, 995)  # title exact but artist unclear/wrong
-
-        best_title_dist = min(best_title_dist, td)
-        best_artist_dist = min(best_artist_dist, ad)
+def _alias_verdict(n_guess: str, context: SongScoringContext) -> Optional[int]:
+    """A guessed title that is the song title or one of its aliases is exact: one set lookup per split."""
+    for g_title, _ in _candidate_splits(n_guess):
+        if g_title and any(k in context.title_keys for k in _alias_keys(g_title)):
+            return 1000
+    return None
+
+def _deterministic_verdict(det: _DeterministicSignals) -> Optional[int]:
+    # Exact song (title) wins everything (artist may be omitted or wrong in user text)
+    if det.saw_title_exact:
+        return 1000
 
     # Artist exact, title not exact => strong but < 1000
-    if saw_artist_exact and not saw_title_exact:
+    if det.saw_artist_exact:
         # Closer the (wrong) title is, higher we go, but cap < 1000
-        boost = int(round(60 * max(0.0, 1.0 - best_title_dist)))  # up to +60
+        boost = int(round(60 * max(0.0, 1.0 - det.best_title_dist)))  # up to +60
         return max(900, min(980, 900 + boost))
 
-    # ---------- 2) Embeddings-based coarse similarity ----------
+    return None
+
+async def _embedding_signals(guess_raw: str, context: SongScoringContext, det: _DeterministicSignals) -> _EmbeddingSignals:
     # Compare guess to: "title by artist", artist, title
-    combo = f"{title_raw} by {artist_raw}".strip()
-    texts = [guess_raw, combo, artist_raw, title_raw]
-    gv, cv, av, tv = await _embed_texts(texts)
-    sim_combo = _cos(gv, cv)            # strongest signal if they sort of describe the song
-    sim_artist = _cos(gv, av)
-    sim_title  = _cos(gv, tv)
+    if context.has_vectors:
+        gv = (await _embed_texts([guess_raw]))[0]
+        refs = context.reference_vectors
+    else:
+        gv, *ref_vecs = await _embed_texts([guess_raw, *context.reference_texts])
+        refs = np.stack(ref_vecs)
+    # combo is the strongest signal if they sort of describe the song
+    sim_combo, sim_artist, sim_title = (float(x) for x in _cosine_sims(gv, refs))
 
     # Map embedding similarity (~-1..1) to [0..1] (clip and shift), then curve
     def _sim01(x: float) -> float:
@@ -183,14 +285,31 @@ async def get_similarity_score(guess: str, correct: Dict[str, str]) -> int:
     base_sem_score = int(round(850 * (base_sem ** 1.25)))
 
     # If both edit-dists are large and sims tiny, don't let base run too high
-    if best_title_dist > 0.35 and best_artist_dist > 0.35 and base_sem < 0.12:
+    if det.best_title_dist > 0.35 and det.best_artist_dist > 0.35 and base_sem < 0.12:
         base_sem_score = min(base_sem_score, 180)
 
-    # If our earlier deterministic near-title hit exists, respect it
-    base_score = max(best_exact, base_sem_score)
+    return _EmbeddingSignals(s_combo, s_artist, s_title, base_sem_score)
 
-    # ---------- 3) One small LLM 'nudge' for nuanced associations ----------
-    # Only call the LLM if we are not already certain (e.g., exact 1000 handled).
+def _is_far(det: _DeterministicSignals, emb: _EmbeddingSignals, max_sim: float = 0.12, min_edit_dist: float = 0.35) -> bool:
+    return (
+        det.best_title_dist > min_edit_dist
+        and det.best_artist_dist > min_edit_dist
+        and max(emb.s_combo, emb.s_artist, emb.s_title) < max_sim
+    )
+
+def _embedding_verdict(det: _DeterministicSignals, emb: _EmbeddingSignals) -> Optional[int]:
+    # Clearly unrelated: the final "far" clamp would cap the LLM-fused score at 200 anyway
+    if _is_far(det, emb, SCORING_UNRELATED_MAX_SIM, SCORING_UNRELATED_MIN_EDIT_DIST):
+        return min(emb.base_score, 200)
+
+    # Clearly near: trust the embeddings and skip the LLM
+    if emb.s_combo >= SCORING_NEAR_MIN_SIM:
+        return emb.base_score
+
+    return None
+
+async def _llm_score(guess_raw: str, context: SongScoringContext, det: _DeterministicSignals, emb: _EmbeddingSignals) -> int:
+    """One small LLM 'nudge' for nuanced associations."""
     system = (
         "You are a strict song-guess scorer for a daily music game. "
         "Return ONLY compact JSON: "
@@ -203,17 +322,17 @@ async def get_similarity_score(guess: str, correct: Dict[str, str]) -> int:
 
     user = f"""
 Correct:
-- title: "{title_raw}"
-- artist: "{artist_raw}"
+- title: "{context.title}"
+- artist: "{context.artist}"
 
 User guess (raw): "{guess_raw}"
 
 Signals:
-- best_title_edit_distance_norm: {best_title_dist:.3f}
-- best_artist_edit_distance_norm: {best_artist_dist:.3f}
-- sim(guess, "title by artist"): {s_combo:.3f}
-- sim(guess, artist): {s_artist:.3f}
-- sim(guess, title): {s_title:.3f}
+- best_title_edit_distance_norm: {det.best_title_dist:.3f}
+- best_artist_edit_distance_norm: {det.best_artist_dist:.3f}
+- sim(guess, "title by artist"): {emb.s_combo:.3f}
+- sim(guess, artist): {emb.s_artist:.3f}
+- sim(guess, title): {emb.s_title:.3f}
 
 Hard constraints you MUST obey:
 - Only output 1000 when the *song title* matches (small typos allowed).
@@ -223,8 +342,8 @@ Hard constraints you MUST obey:
 Now score the guess.
 """
 
-    try:
-        llm = await client.chat.completions.create(
+    llm = await _llm_hedger.call(
+        lambda: client.chat.completions.create(
             model="gpt-4o-mini",
             temperature=0,
             top_p=0,
@@ -234,26 +353,184 @@ Now score the guess.
                 {"role": "system", "content": system},
                 {"role": "user", "content": user},
             ],
-        )
-        obj = json.loads(llm.choices[0].message.content)
-        llm_score = int(obj.get("score", 0))
-    except Exception:
-        llm_score = 0  # fall back gracefully
-
-    # ---------- 4) Post-rules + fuse scores ----------
-    fused = int(round(0.6 * base_score + 0.4 * llm_score))
-
-    # Enforce global bounds and golden rules
-    # If title is exact (within tight threshold), make it 1000
-    if saw_title_exact or best_title_dist <= 0.08:
-        fused = 1000
-
-    # If artist is exact but title isn't, clamp 900–980
-    if saw_artist_exact and not (saw_title_exact or best_title_dist <= 0.08):
-        fused = max(900, min(980, fused))
+        ),
+        timeout=deadline.bounded(LLM_TIMEOUT_SECONDS),
+    )
+    obj = json.loads(llm.choices[0].message.content)
+    return int(obj.get("score", 0))
 
+async def _llm_score_or_none(guess_raw: str, context: SongScoringContext, det: _DeterministicSignals, emb: _EmbeddingSignals) -> Optional[int]:
+    """
+    The LLM call behind the adaptive limiter, hedged and bounded by the
+    per-call timeout and the guess deadline. Returns None (degraded: use the
+    embedding-only score) when the call is shed, times out or fails.
+    Background scoring only calls it on spare capacity, never queueing.
+    """
+    if _background_scoring.get() and not _llm_limiter.has_spare_capacity():
+        metrics.counter("scoring.llm.background_skipped").inc()
+        return None
+    try:
+        async with _llm_limiter.slot(queue_timeout=deadline.bounded(LLM_QUEUE_TIMEOUT_SECONDS)):
+            score = await _llm_score(guess_raw, context, det, emb)
+        metrics.counter("scoring.llm.calls").inc()
+        return score
+    except ConcurrencyLimitExceededException:
+        reason = "shed"
+    except asyncio.TimeoutError:
+        reason = "timeout"
+    except Exception as e:
+        reason = "error"
+        logger.error("LLM scoring failed", error=repr(e))
+    metrics.counter("scoring.llm.fallbacks").inc()
+    metrics.counter(f"scoring.llm.fallbacks.{reason}").inc()
+    return None
+
+@contextmanager
+def background_scoring():
+    """Scoring in the block is low priority: it skips the LLM whenever players are using it all."""
+    token = _background_scoring.set(True)
+    try:
+        yield
+    finally:
+        _background_scoring.reset(token)
+
+def _llm_fallback_rate() -> float:
+    snap = metrics.snapshot()["counters"]
+    fallbacks = snap.get("scoring.llm.fallbacks", 0)
+    total = fallbacks + snap.get("scoring.llm.calls", 0)
+    return round(fallbacks / total, 4) if total else 0.0
+
+metrics.gauge("scoring.llm.fallback_rate", _llm_fallback_rate)
+
+def _fuse(det: _DeterministicSignals, emb: _EmbeddingSignals, llm_score: Optional[int]) -> int:
+    if llm_score is None:
+        # Degraded mode: embedding-only score
+        fused = emb.base_score
+    else:
+        fused = int(round(0.6 * emb.base_score + 0.4 * llm_score))
+
+    # The title/artist golden rules were already enforced by the deterministic tier.
     # If really far by both heuristics, cap low
-    if best_title_dist > 0.35 and best_artist_dist > 0.35 and max(s_combo, s_artist, s_title) < 0.12:
+    if _is_far(det, emb):
         fused = min(fused, 200)
 
     return max(0, min(1000, fused))
+
+def _resolved(tier: str, score: int) -> int:
+    metrics.counter(f"scoring.resolved_by.{tier}").inc()
+    return score
+
+# ========== Batches ==========
+
+def needs_models(guess_raw: str, context: SongScoringContext) -> bool:
+    """True when the guess gets past the alias and deterministic tiers."""
+    n_guess = norm(guess_raw)
+    if _alias_verdict(n_guess, context) is not None:
+        return False
+    det = _deterministic_signals(n_guess, context.title_refs, context.artist_refs)
+    return _deterministic_verdict(det) is None
+
+async def prefetch_embeddings(guesses: Sequence[str], context: SongScoringContext) -> int:
+    """
+    Embeds, in one batched call, the guesses that will reach the embedding
+    tier, so their scoring passes hit the embedding cache. Returns the count.
+    """
+    texts = [g for g in dict.fromkeys(guesses) if g and needs_models(g, context)]
+    if texts:
+        await _embed_texts(texts)
+    return len(texts)
+
+# ========== Main scoring ==========
+
+PROVISIONAL = "provisional"
+FINAL = "final"
+# A final score computed without the LLM nudge it needed (the call was shed, timed
+# out or failed): fine to answer with, but not to cache or reuse for other players
+DEGRADED = "degraded"
+
+async def get_similarity_score(
+    guess: str,
+    correct: Dict[str, str],
+    context: Optional[SongScoringContext] = None,
+) -> int:
+    """
+    Returns an int in [0, 1000].
+    Pass the day's `context` (see build_song_context) to avoid re-embedding
+    the song's reference strings on every guess.
+    Hard rules:
+      - 1000 only if the SONG TITLE matches (minor typos allowed).
+      - Correct artist but wrong/unspecified title => high (≈900–980), but never 1000.
+      - Far guesses => low.
+    Uses: deterministic checks -> embeddings -> one LLM 'nudge' with strict JSON,
+    stopping at the first tier that is confident. The whole pass runs under a
+    SCORING_DEADLINE_SECONDS deadline: an LLM call that cannot finish in time
+    degrades to the embedding-only score, embeddings that cannot raise
+    asyncio.TimeoutError.
+    """
+    return (await score_guess(guess, correct, context))[0]
+
+async def score_guess(
+    guess: str,
+    correct: Dict[str, str],
+    context: Optional[SongScoringContext] = None,
+) -> Tuple[int, bool]:
+    """get_similarity_score plus whether the score is degraded (see DEGRADED)."""
+    stage = score = None
+    async for stage, score in score_stages(guess, correct, context):
+        pass
+    return score, stage == DEGRADED
+
+async def score_stages(
+    guess: str,
+    correct: Dict[str, str],
+    context: Optional[SongScoringContext] = None,
+) -> AsyncIterator[Tuple[str, int]]:
+    """
+    get_similarity_score as a stream of (PROVISIONAL | FINAL, score). A guess
+    that needs the LLM first yields the embedding-only score (what the guess
+    would get if the LLM were unavailable) as PROVISIONAL; every guess ends
+    with exactly one FINAL, or DEGRADED when the LLM could not be used.
+    """
+    if context is None:
+        context = SongScoringContext.from_song(correct)
+    guess_raw = guess or ""
+    # Entered per awaited stage rather than around the yields: the consumer runs in between
+    expires = time.monotonic() + SCORING_DEADLINE_SECONDS
+
+    with timed_stage("normalize"):
+        n_guess = norm(guess_raw)
+
+    # ---------- 0) Exact title / alias lookup ----------
+    with timed_stage("alias"):
+        score = _alias_verdict(n_guess, context)
+    if score is not None:
+        yield FINAL, _resolved("alias", score)
+        return
+
+    # ---------- 1) Deterministic fast paths ----------
+    with timed_stage("splits"):
+        det = _deterministic_signals(n_guess, context.title_refs, context.artist_refs)
+        score = _deterministic_verdict(det)
+    if score is not None:
+        yield FINAL, _resolved("deterministic", score)
+        return
+
+    # ---------- 2) Embeddings-based coarse similarity ----------
+    with timed_stage("embeddings"), deadline.deadline_at(expires):
+        emb = await _embedding_signals(guess_raw, context, det)
+        score = _embedding_verdict(det, emb)
+    if score is not None:
+        yield FINAL, _resolved("embeddings", score)
+        return
+
+    yield PROVISIONAL, _fuse(det, emb, None)
+
+    # ---------- 3) LLM nudge, then post-rules + fuse ----------
+    with timed_stage("llm"), deadline.deadline_at(expires):
+        llm_score = await _llm_score_or_none(guess_raw, context, det, emb)
+    with timed_stage("fuse"):
+        score = _fuse(det, emb, llm_score)
+    if llm_score is None:
+        yield DEGRADED, _resolved("embeddings_fallback", score)
+    else:
+        yield FINAL, _resolved("llm", score)
@@ -2,23 +2,31 @@ from firebase.firebase import get_firestore_client
 from google.cloud import firestore
 from datetime import datetime, timezone, date
 from app.guesses.repository import GuessResponse
+from app.shared.cache import BoundedTTLCache
+from app.shared.shared_cache import shared_cache
+from app.guesses.consts import GUESS_SCORE_CACHE_MAX_ENTRIES, GUESS_SCORE_CACHE_MAX_BYTES
 
 db = get_firestore_client()
 guesses_ref = db.collection("guesses")
 
-_cached_guesses = {}
-_cache_date = None
+# (song id, normalized guess) -> score, expiring at the next UTC midnight.
+# Backed by the host-shared cache, so a guess scored by one worker is a hit for all.
+_cached_guesses = BoundedTTLCache("guess_scores", GUESS_SCORE_CACHE_MAX_ENTRIES, GUESS_SCORE_CACHE_MAX_BYTES, shared=shared_cache)
 
 
-async def add_guess(user_id: str, guess: str, song_id: str, is_correct: bool, score: int) -> None:
+async def add_guess(user_id: str, guess: str, song_id: str, is_correct: bool, score: int, guess_key: str = None, degraded: bool = False) -> None:
     data = {
         "user_id": user_id,
         "song_id": song_id,
         "is_correct": is_correct,
         "guess": guess,
+        # Other players' score lookups key on guess_norm: a degraded score stays out of them
+        "guess_norm": None if degraded else guess_key,
         "score": score,
         "timestamp": firestore.SERVER_TIMESTAMP,
     }
+    if degraded:
+        data["degraded"] = True
     await guesses_ref.add(data)
 
 async def get_guesses(user_id: str):
@@ -40,34 +48,30 @@ async def get_guesses(user_id: str):
         )
     return guesses
 
-def clean_cache_not_from_today():
-    global _cached_guesses, _cache_date
-    now = datetime.now(timezone.utc)
-    today = now.date()
-
-    if _cache_date != today:
-        _cached_guesses = {}
-        _cache_date = today
-
-async def get_cached_guess_of_today(guess: str):
-    global _cached_guesses, _cache_date
-    now = datetime.now(timezone.utc)
-    clean_cache_not_from_today()
-    
-    if guess in _cached_guesses:
-        return (_cached_guesses[guess], True)
+async def get_cached_guess_of_today(song_id: str, guess_key: str):
+    """
+    Looks up a score by (song id, normalized guess). The raw guess text is
+    only kept for history, so case/punctuation variants share one score.
+    """
+    cache_key = (song_id, guess_key)
+    score = _cached_guesses.get(cache_key)
+    if score is not None:
+        return (score, True)
 
-    start_of_day = datetime(year=now.year, month=now.month, day=now.day, tzinfo=timezone.utc)
-    query = guesses_ref.where("guess", "==", guess).where("timestamp", ">=", start_of_day)
+    query = guesses_ref.where("song_id", "==", song_id).where("guess_norm", "==", guess_key).limit(1)
     docs = query.stream()
     async for doc in docs:
         data = doc.to_dict()
         score = data.get("score", None)
-        _cached_guesses[guess] = score
+        if score is not None:
+            _cached_guesses.set(cache_key, score)
         return (score, True)
         
     return (None, False)
 
-async def cache_guess(guess: str, score: int):
-    global _cached_guesses
-    _cached_guesses[guess] = score
\ No newline at end of file
+def peek_cached_guess(song_id: str, guess_key: str):
+    """Score from the cache only (no Firestore lookup), or None."""
+    return _cached_guesses.get((song_id, guess_key))
+
+async def cache_guess(song_id: str, guess_key: str, score: int):
+    _cached_guesses.set((song_id, guess_key), score)
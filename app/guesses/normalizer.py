@@ -0,0 +1,65 @@
+"""
+Text normalizer used for every title, artist and guess.
+
+Produces exactly what the original regex chain did (fold accents, lowercase,
+drop bracketed/version words, collapse punctuation) but with precompiled
+patterns, str.translate for the ASCII punctuation pass, fast paths that skip
+passes which cannot match, and a bounded memo of recent inputs.
+See scripts/bench_normalizer.py for the old-vs-new comparison.
+"""
+
+import os
+import re
+import string
+import unicodedata
+from functools import lru_cache
+
+NORMALIZER_CACHE_SIZE = int(os.getenv("NORMALIZER_CACHE_SIZE", "16384"))
+
+_BRACKETED = re.compile(r"\(.*?\)|\[.*?\]")
+_VERSION_WORDS = re.compile(r"\b(remaster(?:ed)?|live|acoustic|feat\.?|ft\.?|version|edit|mix|rmx)\b")
+# "\b&\b": an ampersand glued between two word characters ("a&b")
+_GLUED_AMPERSAND = re.compile(r"(?<=\w)&(?=\w)")
+_NON_ALNUM = re.compile(r"[^a-z0-9\s]")
+
+# Every ASCII character other than [a-z0-9] becomes a separator
+_ASCII_PUNCT_TABLE = str.maketrans({
+    ch: " " for ch in map(chr, range(128)) if ch not in string.ascii_lowercase + string.digits
+})
+
+
+def _ascii_fold(s: str) -> str:
+    # strip accents but keep letters/numbers
+    if s.isascii():
+        return s
+    s = unicodedata.normalize("NFKD", s)
+    return "".join(ch for ch in s if not unicodedata.combining(ch))
+
+
+def _normalize(s: str) -> str:
+    s = _ascii_fold(s).lower()
+    # remove parens/brackets content (remaster, live, feat, etc.)
+    if "(" in s or "[" in s:
+        s = _BRACKETED.sub(" ", s)
+    s = _VERSION_WORDS.sub(" ", s)
+    # normalize &, and ("and" itself is already in its final form)
+    if "&" in s:
+        s = _GLUED_AMPERSAND.sub(" and ", s)
+    # collapse punctuation to spaces
+    s = s.translate(_ASCII_PUNCT_TABLE)
+    if not s.isascii():
+        s = _NON_ALNUM.sub(" ", s)
+    return " ".join(s.split())
+
+
+_normalize_cached = lru_cache(maxsize=NORMALIZER_CACHE_SIZE)(_normalize)
+
+
+def normalize(s: str) -> str:
+    if not s:
+        return ""
+    return _normalize_cached(s)
+
+
+def cache_info():
+    return _normalize_cached.cache_info()
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List
 
 class GuessRequest(BaseModel):
     guess: str
@@ -12,4 +13,23 @@ class GuessResponse(BaseModel):
     score: int
     credit_url: Optional[str] = None
     title: Optional[str] = None
-    artist: Optional[str] = None
\ No newline at end of file
+    artist: Optional[str] = None
+
+class BatchScoreRequest(BaseModel):
+    song_id: str
+    guesses: List[str]
+    # False: score fresh (e.g. disputed guesses) without reading or writing the score cache
+    use_cache: bool = True
+
+class BatchScoreItem(BaseModel):
+    guess: str
+    score: Optional[int] = None
+    is_correct: bool = False
+    cached: bool = False
+    # Scored without the LLM (shed or timed out); not cached
+    degraded: bool = False
+    error: Optional[str] = None
+
+class BatchScoreResponse(BaseModel):
+    song_id: str
+    scores: List[BatchScoreItem]
@@ -1,20 +1,51 @@
+import json
 from fastapi import APIRouter, Depends, Request
-from app.guesses.repository import GuessRequest, GuessResponse
-from app.guesses.service import make_guess
-from app.shared.dependencies import get_current_user
+from fastapi.responses import StreamingResponse
+from app.guesses.repository import GuessRequest, GuessResponse, BatchScoreRequest, BatchScoreResponse
+from app.guesses.service import make_guess, make_guess_stream, score_guesses
+from app.shared.dependencies import get_current_user, get_internal_service_user
 from app.middlewares.route_rate_limiter import rate_limited
 from app.guesses.service import get_user_guesses
 
 router = APIRouter(prefix="/guesses", tags=["guesses"])
 
 @router.post("", response_model=GuessResponse)
-@rate_limited(limit=10, window=60)  # 10 guesses per minute per user
+@rate_limited(limit=10, window=60, scope="guesses")  # 10 guesses per minute per user, across both routes
 async def guess_song(
     request: Request,
     user=Depends(get_current_user(False))
 ):
     return await make_guess(user["user_id"], await request.json())
 
+@router.post("/stream")
+@rate_limited(limit=10, window=60, scope="guesses")  # 10 guesses per minute per user, across both routes
+async def guess_song_stream(
+    request: Request,
+    user=Depends(get_current_user(False))
+):
+    """
+    Same as POST /guesses, as Server-Sent Events: a "provisional" score as soon
+    as the fast stages know it (only when the LLM nudge is still pending),
+    then a "final" GuessResponse, or an "error" {detail, status_code}.
+    """
+    events = await make_guess_stream(user["user_id"], await request.json())
+
+    async def body():
+        async for event, payload in events:
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/history", response_model=list[GuessResponse])
 async def guess_history(user=Depends(get_current_user(allow_unauthenticated=False))):
     return await get_user_guesses(user["user_id"])
+
+
+@router.post("/batch-score", response_model=BatchScoreResponse)
+async def batch_score(body: BatchScoreRequest, identity=Depends(get_internal_service_user())):
+    """Internal tools only: scores guesses against a song without using any user's quota."""
+    return await score_guesses(body)
@@ -1,77 +1,329 @@
-from app.guesses.consts import MAX_DAILY_GUESSES_FREE_USER, MAX_DAILY_GUESSES_PREMIUM
-from app.guesses.model import add_guess, get_guesses, get_cached_guess_of_today, cache_guess
-from app.guesses.repository import GuessRequest, GuessResponse
+from app.guesses.consts import (
+    MAX_DAILY_GUESSES_FREE_USER,
+    MAX_DAILY_GUESSES_PREMIUM,
+    SCORING_TIMEOUT_SECONDS,
+    BATCH_SCORE_MAX_GUESSES,
+    BATCH_SCORE_CONCURRENCY,
+)
+from app.guesses.model import add_guess, get_guesses, get_cached_guess_of_today, cache_guess, peek_cached_guess
+from app.guesses.repository import GuessRequest, GuessResponse, BatchScoreRequest, BatchScoreItem, BatchScoreResponse
 from datetime import datetime, timedelta
-from .logic import get_similarity_score
+from .logic import (
+    score_guess,
+    score_stages,
+    build_song_context,
+    prefetch_embeddings,
+    needs_models,
+    SongScoringContext,
+    norm,
+    PROVISIONAL,
+    FINAL,
+    DEGRADED,
+)
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Tuple, Union
 import time
+import asyncio
+import structlog
+from fastapi import HTTPException
 from app.shared.http import call_internal_service
-from app.shared.exceptions import UserNotFoundException, NoGuessesLeftException
+from app.shared import metrics
+from app.shared.single_flight import SingleFlight
+from app.shared.timing import timed, timed_stage
+from app.shared.cache import BoundedTTLCache
+from app.shared.shared_cache import shared_cache
+from app.shared.exceptions import (
+    AppException,
+    UserNotFoundException,
+    NoGuessesLeftException,
+    ScoringTimeoutException,
+    SongNotFoundException,
+    BatchTooLargeException,
+)
+
+logger = structlog.get_logger()
+
+# A pass nobody waits for any more (e.g. a discarded speculative score) is cancelled
+_scoring_flight = SingleFlight("guess_scoring", cancel_abandoned=True)
+_winner_song_flight = SingleFlight("winner_song")
+# Day epoch -> winner song, shared by the workers on this host
+_winner_songs = BoundedTTLCache("winner_song", max_entries=2, shared=shared_cache)
 
 # Cache state
 _cached_daily_song = None
+_cached_song_context = None
 _cached_epoch = 0
 
 async def get_cached_winner_song():
-    global _cached_daily_song, _cached_epoch
+    global _cached_daily_song, _cached_song_context, _cached_epoch
     now = time.time()
     today_epoch = int(now - (now % 86400))
     if _cached_daily_song and _cached_epoch == today_epoch:
         return _cached_daily_song
 
-    # Fetch from songs service
-    song = await call_internal_service("/songs/winner")
+    # Only one fetch + context build per rollover, however many guesses are waiting
+    return await _winner_song_flight.do(today_epoch, lambda: _refresh_winner_song(today_epoch))
+
+async def _refresh_winner_song(today_epoch: int):
+    global _cached_daily_song, _cached_song_context, _cached_epoch
+    song = _winner_songs.get(today_epoch)
+    if song is None:
+        # Fetch from songs service
+        song = await call_internal_service("/songs/winner")
+        if song:
+            _winner_songs.set(today_epoch, song)
     _cached_daily_song = song
+    _cached_song_context = await _build_song_context_safe(song)
     _cached_epoch = today_epoch
     return song
 
-async def is_guess_correct(user_guess: str, daily_song: dict) -> bool:
-    (score, is_cached_from_today) = await get_cached_guess_of_today(user_guess)
+async def _build_song_context_safe(song: dict):
+    # Scoring still works without a context (it just embeds the references per guess)
+    if not song:
+        return None
+    try:
+        return await build_song_context(song)
+    except Exception as e:
+        logger.error("Failed to build song scoring context", song_id=song.get("id"), error=repr(e))
+        return None
+
+def get_song_context(song: dict):
+    """Returns the pinned scoring context if it belongs to `song`."""
+    ctx: SongScoringContext = _cached_song_context
+    if ctx and song and ctx.song_id == song.get("id"):
+        return ctx
+    return None
+
+def guess_cache_key(user_guess: str) -> str:
+    # Fall back to the trimmed raw text for guesses that normalize to nothing
+    return norm(user_guess) or (user_guess or "").strip()
+
+async def is_guess_correct(user_guess: str, daily_song: dict) -> Tuple[int, bool]:
+    """Returns (score, degraded); see DEGRADED in logic."""
+    song_id = daily_song.get("id")
+    guess_key = guess_cache_key(user_guess)
+    # Concurrent requests for the same (song, normalized guess) share one scoring pass
+    try:
+        return await _scoring_flight.do(
+            (song_id, guess_key),
+            lambda: _score_guess(user_guess, guess_key, daily_song),
+            timeout=SCORING_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        logger.error("Guess scoring timed out", song_id=song_id, guess=guess_key)
+        raise ScoringTimeoutException()
+
+async def _score_guess(user_guess: str, guess_key: str, daily_song: dict) -> Tuple[int, bool]:
+    song_id = daily_song.get("id")
+    (score, is_cached_from_today) = await get_cached_guess_of_today(song_id, guess_key)
     if is_cached_from_today:
-        return score
+        return score, False
     
-    score = await get_similarity_score(user_guess, daily_song)
-    await cache_guess(user_guess, score)
-    return score
+    return await _score_and_cache(user_guess, guess_key, daily_song, get_song_context(daily_song))
 
-async def make_guess(user_id: str, body: GuessRequest) -> GuessResponse:
-    user = await call_internal_service("/users", "GET", None, { "user_id": user_id })
-    if not user:
-        raise UserNotFoundException()
-    user_new_guess = body["guess"]
+async def warm_guess(user_guess: str, daily_song: dict, context: SongScoringContext = None) -> bool:
+    """
+    Scores `user_guess` into the score cache ahead of players. Skips the
+    Firestore lookup (the song is new); returns False if it was already cached
+    (or its score came out degraded and was not cached).
+    """
+    song_id = daily_song.get("id")
+    guess_key = guess_cache_key(user_guess)
+    if peek_cached_guess(song_id, guess_key) is not None:
+        return False
+
+    # Shares the flight with real guesses, so a player sending it meanwhile waits for this pass
+    _, degraded = await _scoring_flight.do(
+        (song_id, guess_key),
+        lambda: _score_and_cache(user_guess, guess_key, daily_song, context),
+        timeout=SCORING_TIMEOUT_SECONDS,
+    )
+    return not degraded
+
+async def _score_and_cache(user_guess: str, guess_key: str, song: dict, context: SongScoringContext) -> Tuple[int, bool]:
+    score, degraded = await score_guess(user_guess, song, context)
+    # A degraded score is only this caller's answer: the next guess tries the LLM again
+    if not degraded:
+        await cache_guess(song.get("id"), guess_key, score)
+    return score, degraded
+
+async def _get_song_for_scoring(song_id: str):
+    """Returns (song, scoring context); today's song reuses the pinned context."""
     daily_song = await get_cached_winner_song()
-    
+    if daily_song and daily_song.get("id") == song_id:
+        return daily_song, get_song_context(daily_song)
+    song = await call_internal_service(f"/songs/{song_id}")
+    if not song:
+        raise SongNotFoundException()
+    song = {**song, "id": song.get("id") or song_id}
+    return song, await _build_song_context_safe(song)
+
+async def score_guesses(body: BatchScoreRequest) -> BatchScoreResponse:
+    """
+    Scores a list of guesses against one song without touching any user's
+    state. Guesses are deduplicated by normalized form; the ones that will
+    need embeddings are embedded in one batched call up front, then scored
+    with bounded concurrency (the LLM limiter still applies per call).
+    """
+    if len(body.guesses) > BATCH_SCORE_MAX_GUESSES:
+        raise BatchTooLargeException(f"At most {BATCH_SCORE_MAX_GUESSES} guesses per batch")
+    song, context = await _get_song_for_scoring(body.song_id)
+    if context is None:
+        context = SongScoringContext.from_song(song)
+
+    unique = {}
+    for guess in body.guesses:
+        unique.setdefault(guess_cache_key(guess), guess)
+
+    results = {}
+    to_score = {}
+    for guess_key, guess in unique.items():
+        cached = peek_cached_guess(body.song_id, guess_key) if body.use_cache else None
+        if cached is not None:
+            results[guess_key] = BatchScoreItem(guess=guess, score=cached, is_correct=cached == 1000, cached=True)
+        else:
+            to_score[guess_key] = guess
+
+    try:
+        await prefetch_embeddings(list(to_score.values()), context)
+    except Exception as e:
+        # Not fatal: each guess embeds on its own (and degrades on its own) below
+        logger.warning("Batch embedding prefetch failed", song_id=body.song_id, error=repr(e))
+
+    sem = asyncio.Semaphore(BATCH_SCORE_CONCURRENCY)
+
+    async def one(guess_key: str, guess: str):
+        async with sem:
+            try:
+                if body.use_cache:
+                    score, degraded = await _scoring_flight.do(
+                        (body.song_id, guess_key),
+                        lambda: _score_and_cache(guess, guess_key, song, context),
+                        timeout=SCORING_TIMEOUT_SECONDS,
+                    )
+                else:
+                    score, degraded = await asyncio.wait_for(score_guess(guess, song, context), SCORING_TIMEOUT_SECONDS)
+                results[guess_key] = BatchScoreItem(guess=guess, score=score, is_correct=score == 1000, degraded=degraded)
+            except asyncio.TimeoutError:
+                results[guess_key] = BatchScoreItem(guess=guess, error="timeout")
+            except Exception as e:
+                logger.error("Batch guess scoring failed", song_id=body.song_id, guess=guess_key, error=repr(e))
+                results[guess_key] = BatchScoreItem(guess=guess, error="scoring_failed")
+
+    await asyncio.gather(*[one(k, g) for k, g in to_score.items()])
+
+    # One item per input guess, in order; duplicates share their normalized guess's result
+    scores = [results[guess_cache_key(g)].model_copy(update={"guess": g}) for g in body.guesses]
+    return BatchScoreResponse(song_id=body.song_id, scores=scores)
+
+@dataclass
+class _GuessTurn:
+    """A guess the user is allowed to make, with what is needed to record it."""
+    user_id: str
+    user: dict
+    guess: str
+    daily_song: dict
+    user_guesses: dict
+    guesses_made_today: int
+    allowed_today: int
+    # Speculative scoring started before the quota checks finished (make_guess only)
+    score_task: Optional[asyncio.Future] = None
+
+def _discard(*tasks: Optional[asyncio.Future]):
+    """Cancels work that is no longer needed (errors of finished tasks are dropped)."""
+    for task in tasks:
+        if task is None:
+            continue
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()
+
+def _is_cheap_to_score(user_guess: str, daily_song: dict) -> bool:
+    """True when the guess is answered by the score cache or without embeddings/LLM."""
+    if peek_cached_guess(daily_song.get("id"), guess_cache_key(user_guess)) is not None:
+        return True
+    context = get_song_context(daily_song) or SongScoringContext.from_song(daily_song)
+    return not needs_models(user_guess, context)
+
+async def _score_when_song_known(song_task: asyncio.Future, user_guess: str, checks_passed: asyncio.Event) -> Tuple[int, bool]:
+    daily_song = await song_task
+    if not _is_cheap_to_score(user_guess, daily_song):
+        # Paid model calls only for guesses the user is allowed to make
+        await checks_passed.wait()
+    with timed_stage("score"):
+        return await is_guess_correct(user_guess, daily_song)
+
+async def _start_guess(user_id: str, body: GuessRequest, speculate: bool = False) -> Union[GuessResponse, _GuessTurn]:
+    """
+    Checks the user and their quota; a repeated guess returns its earlier response.
+    The user, the song and the user's history are fetched concurrently. With
+    `speculate`, a guess that is cached or needs no model tier is scored as
+    soon as the song is known, in parallel with the checks; one that needs
+    embeddings or the LLM waits for the checks. Speculative work is cancelled
+    if the checks reject the guess.
+    """
+    user_new_guess = body["guess"]
+    checks_passed = asyncio.Event()
+    user_task = asyncio.ensure_future(timed("fetch_user", call_internal_service("/users", "GET", None, { "user_id": user_id })))
+    song_task = asyncio.ensure_future(timed("fetch_song", get_cached_winner_song()))
+    history_task = asyncio.ensure_future(timed("fetch_history", get_guesses(user_id)))
+    score_task = asyncio.ensure_future(_score_when_song_known(song_task, user_new_guess, checks_passed)) if speculate else None
+
+    try:
+        user = await user_task
+        if not user:
+            raise UserNotFoundException()
+
+        today = datetime.utcnow().date().isoformat()
+        guesses_user_made_today = await history_task
+        for past_guess in list(guesses_user_made_today):
+            if past_guess.guess == user_new_guess:
+                _discard(song_task, score_task)
+                return GuessResponse(guess=user_new_guess, is_correct=past_guess.is_correct, score=past_guess.score, guesses_left=user.get("guesses_left"), credit_url=past_guess.credit_url)
+
+        user_guesses = user.get("guesses", {})
+        guesses_made_today = user_guesses.get(today, 0)
+        guesses_user_allowed_to_make_today = MAX_DAILY_GUESSES_PREMIUM if user.get("is_subscribed") else MAX_DAILY_GUESSES_FREE_USER
+        if guesses_made_today >= guesses_user_allowed_to_make_today:
+            raise NoGuessesLeftException()
+
+        daily_song = await song_task
+        checks_passed.set()
+    except BaseException:
+        if score_task is not None:
+            metrics.counter("guesses.speculation.discarded").inc()
+        _discard(user_task, song_task, history_task, score_task)
+        raise
+
+    return _GuessTurn(user_id, user, user_new_guess, daily_song, user_guesses, guesses_made_today, guesses_user_allowed_to_make_today, score_task)
+
+async def _finish_guess(turn: _GuessTurn, score: int, degraded: bool = False) -> GuessResponse:
+    """Records the scored guess (history + user quota, concurrently) and builds the response."""
     today = datetime.utcnow().date().isoformat()
     yesterday = (datetime.utcnow() - timedelta(days=1)).date().isoformat()
-    guesses_user_made_today = await get_guesses(user_id)
-    for past_guess in list(guesses_user_made_today):
-        if past_guess.guess == user_new_guess:
-            return GuessResponse(guess=user_new_guess, is_correct=past_guess.is_correct, score=past_guess.score, guesses_left=user.get("guesses_left"), credit_url=past_guess.credit_url)
-
-    user_guesses = user.get("guesses", {})
-    guesses_made_today = user_guesses.get(today, 0)
-    guesses_user_allowed_to_make_today = MAX_DAILY_GUESSES_PREMIUM if user.get("is_subscribed") else MAX_DAILY_GUESSES_FREE_USER
-    if guesses_made_today >= guesses_user_allowed_to_make_today:
-        raise NoGuessesLeftException()
-    
-    score = await is_guess_correct(user_new_guess, daily_song)
+    daily_song = turn.daily_song
     is_correct = score == 1000
     
-    await add_guess(user_id, user_new_guess, daily_song["id"], is_correct, score)
-    updated_guesses = {**user_guesses, today: guesses_made_today + 1}
-    guesses_left = guesses_user_allowed_to_make_today - updated_guesses[today]
+    updated_guesses = {**turn.user_guesses, today: turn.guesses_made_today + 1}
+    guesses_left = turn.allowed_today - updated_guesses[today]
     
-    await call_internal_service(
-    "/users",
-    "PUT",
-    {
-        **user,
-        "guesses": updated_guesses,
-        "guesses_left": guesses_left,
-        "last_guess_date": datetime.utcnow().isoformat(),
-        "last_time_guessed_right": today if is_correct else yesterday
-    },
-    { "user_id": user_id }
-)
+    with timed_stage("persist"):
+        await asyncio.gather(
+            add_guess(turn.user_id, turn.guess, daily_song["id"], is_correct, score, guess_cache_key(turn.guess), degraded),
+            call_internal_service(
+                "/users",
+                "PUT",
+                {
+                    **turn.user,
+                    "guesses": updated_guesses,
+                    "guesses_left": guesses_left,
+                    "last_guess_date": datetime.utcnow().isoformat(),
+                    "last_time_guessed_right": today if is_correct else yesterday
+                },
+                { "user_id": turn.user_id }
+            ),
+        )
 
     credit_url = None
     title = None
@@ -81,7 +333,88 @@ async def make_guess(user_id: str, body: GuessRequest) -> GuessResponse:
         artist = daily_song.get("artist")
         title = daily_song.get("title")
 
-    return GuessResponse(guess=user_new_guess, is_correct=is_correct, score=score, guesses_left=guesses_left, credit_url=credit_url, title=title, artist=artist)
+    return GuessResponse(guess=turn.guess, is_correct=is_correct, score=score, guesses_left=guesses_left, credit_url=credit_url, title=title, artist=artist)
+
+async def make_guess(user_id: str, body: GuessRequest) -> GuessResponse:
+    turn = await _start_guess(user_id, body, speculate=True)
+    if isinstance(turn, GuessResponse):
+        metrics.counter("guesses.speculation.discarded").inc()
+        return turn
+    metrics.counter("guesses.speculation.used").inc()
+    score, degraded = await turn.score_task
+    return await _finish_guess(turn, score, degraded)
+
+async def make_guess_stream(user_id: str, body: GuessRequest) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Streaming variant of make_guess. User/quota errors are raised here, before
+    anything is streamed; the returned iterator then yields (event, payload):
+    "provisional" {guess, score} while the LLM nudge is pending, one "final"
+    with the GuessResponse once the final score is recorded, or "error".
+    Only the final score is persisted.
+    """
+    turn = await _start_guess(user_id, body)
+    return _guess_events(turn)
+
+async def _guess_events(turn: Union[GuessResponse, _GuessTurn]) -> AsyncIterator[Tuple[str, dict]]:
+    if isinstance(turn, GuessResponse):
+        yield "final", turn.model_dump()
+        return
+    try:
+        async for stage, score in _score_stages_cached(turn.guess, turn.daily_song):
+            if stage == PROVISIONAL:
+                yield "provisional", {"guess": turn.guess, "score": score}
+            else:
+                yield "final", (await _finish_guess(turn, score, stage == DEGRADED)).model_dump()
+    except asyncio.TimeoutError:
+        e = ScoringTimeoutException()
+        yield "error", {"detail": e.message, "status_code": e.status_code}
+    except AppException as e:
+        yield "error", {"detail": e.message, "status_code": e.status_code}
+    except HTTPException as e:
+        yield "error", {"detail": e.detail, "status_code": e.status_code}
+    except Exception as e:
+        # The response has started: report the failure in-stream instead of cutting it off
+        logger.error("Streaming guess failed", user_id=turn.user_id, guess=turn.guess, error=repr(e))
+        yield "error", {"detail": "Internal server error", "status_code": 500}
+
+async def _score_stages_cached(user_guess: str, daily_song: dict) -> AsyncIterator[Tuple[str, int]]:
+    """
+    score_stages behind the score cache and the scoring flight. A cached score
+    is yielded as final right away. Otherwise the first caller for the
+    (song, guess) runs the pass and streams its provisional score; identical
+    guesses arriving meanwhile (streamed or not) share the pass and get its
+    final (FINAL, or DEGRADED when the LLM could not be used; that one is not cached).
+    """
+    song_id = daily_song.get("id")
+    guess_key = guess_cache_key(user_guess)
+    (score, is_cached_from_today) = await get_cached_guess_of_today(song_id, guess_key)
+    if is_cached_from_today and score is not None:
+        yield FINAL, score
+        return
+
+    provisional: asyncio.Queue = asyncio.Queue()
+
+    async def run() -> Tuple[int, bool]:
+        async for stage, score in score_stages(user_guess, daily_song, get_song_context(daily_song)):
+            if stage == PROVISIONAL:
+                provisional.put_nowait(score)
+            elif stage == DEGRADED:
+                return score, True
+            else:
+                await cache_guess(song_id, guess_key, score)
+                return score, False
+
+    final = asyncio.ensure_future(_scoring_flight.do((song_id, guess_key), run, timeout=SCORING_TIMEOUT_SECONDS))
+    final.add_done_callback(lambda _: provisional.put_nowait(None))
+    try:
+        while (score := await provisional.get()) is not None:
+            yield PROVISIONAL, score
+        score, degraded = final.result()
+        yield DEGRADED if degraded else FINAL, score
+    finally:
+        # The client went away: let the flight drop the pass if nobody else waits for it
+        if not final.done():
+            final.cancel()
 
 
 async def get_user_guesses(user_id: str) -> list[GuessResponse]:
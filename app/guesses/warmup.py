@@ -0,0 +1,131 @@
+"""
+Score cache warm-up at song rotation.
+
+When a new daily song is picked, the most frequent guesses of the last few
+days plus the catalog's titles/artists are scored against it in the
+background, so the morning wave of players finds the obvious guesses
+already in the (host-shared) score cache instead of paying for embeddings
+and the LLM on the request path. Rotation is also when players arrive, so
+warm-up runs as background scoring: guesses that would need the LLM while
+players are queued for it come out degraded and are left uncached.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+import structlog
+from google.cloud import firestore
+from app.shared import metrics
+from app.shared.cache import next_utc_midnight
+from app.shared.shared_cache import shared_cache
+from app.songs.model import songs_ref
+from .model import guesses_ref
+from .logic import build_song_context, background_scoring
+from .service import guess_cache_key, warm_guess
+from .consts import (
+    WARMUP_ENABLED,
+    WARMUP_LOOKBACK_DAYS,
+    WARMUP_MAX_SCANNED_GUESSES,
+    WARMUP_TOP_GUESSES,
+    WARMUP_MAX_CATALOG_GUESSES,
+    WARMUP_CONCURRENCY,
+)
+
+logger = structlog.get_logger()
+
+_started_song_ids = set()
+_tasks = set()
+
+
+async def _popular_guesses() -> List[str]:
+    """Most frequent normalized guesses of the lookback window (one raw spelling each)."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=WARMUP_LOOKBACK_DAYS)
+    # Newest first, so the scan cap drops the oldest guesses rather than an arbitrary slice
+    query = (
+        guesses_ref.where("timestamp", ">=", cutoff)
+        .order_by("timestamp", direction=firestore.Query.DESCENDING)
+        .select(["guess", "guess_norm"])
+        .limit(WARMUP_MAX_SCANNED_GUESSES)
+    )
+    counts: Counter = Counter()
+    spelling: Dict[str, str] = {}
+    async for doc in query.stream():
+        data = doc.to_dict()
+        raw = data.get("guess") or ""
+        key = data.get("guess_norm") or guess_cache_key(raw)
+        if key:
+            counts[key] += 1
+            spelling.setdefault(key, raw)
+    return [spelling[key] for key, _ in counts.most_common(WARMUP_TOP_GUESSES)]
+
+
+async def _catalog_guesses() -> List[str]:
+    guesses = []
+    async for doc in songs_ref.select(["title", "artist"]).stream():
+        data = doc.to_dict()
+        title, artist = data.get("title"), data.get("artist")
+        guesses += [g for g in (title, artist, title and artist and f"{title} {artist}") if g]
+        if len(guesses) >= WARMUP_MAX_CATALOG_GUESSES:
+            break
+    return guesses[:WARMUP_MAX_CATALOG_GUESSES]
+
+
+async def warm_score_cache(song: dict) -> int:
+    """Scores the warm-up candidates against `song`; returns how many were scored."""
+    started = time.perf_counter()
+    popular, catalog = await asyncio.gather(_popular_guesses(), _catalog_guesses())
+    candidates: Dict[str, str] = {}
+    for guess in popular + catalog:
+        candidates.setdefault(guess_cache_key(guess), guess)
+    context = await build_song_context(song)
+
+    sem = asyncio.Semaphore(WARMUP_CONCURRENCY)
+    scored = 0
+
+    async def one(guess: str):
+        nonlocal scored
+        async with sem:
+            try:
+                if await warm_guess(guess, song, context):
+                    scored += 1
+            except Exception as e:
+                metrics.counter("warmup.errors").inc()
+                logger.warning("Warm-up scoring failed", guess=guess, error=repr(e))
+
+    with background_scoring():
+        await asyncio.gather(*[one(g) for g in candidates.values()])
+    metrics.counter("warmup.scored").inc(scored)
+    logger.info(
+        "Score cache warmed",
+        song_id=song.get("id"),
+        candidates=len(candidates),
+        scored=scored,
+        seconds=round(time.perf_counter() - started, 2),
+    )
+    return scored
+
+
+def start_warmup(song: dict):
+    """
+    Starts warm_score_cache(song) in the background, once per song per host
+    (the first worker to claim it runs it).
+    """
+    song_id = song and song.get("id")
+    if not WARMUP_ENABLED or not song_id or song_id in _started_song_ids:
+        return
+    _started_song_ids.add(song_id)
+    if shared_cache is not None and not shared_cache.claim("warmup", song_id, next_utc_midnight()):
+        return
+
+    task = asyncio.get_running_loop().create_task(_run(song))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _run(song: dict):
+    try:
+        await warm_score_cache(song)
+    except Exception as e:
+        logger.error("Score cache warm-up failed", song_id=song.get("id"), error=repr(e))
@@ -1,8 +1,9 @@
 from app.core.app_factory import create_app
-from app.users.routes import router as users_router
+from app.users.routes import router as users_router, local_handlers as users_local_handlers
 from app.guesses.routes import router as guesses_router
-from app.songs.routes import router as songs_router
+from app.songs.routes import router as songs_router, local_handlers as songs_local_handlers
 from app.webhooks.main import router as webhooks_router
+from app.shared.service_locator import register_local_services
 
 app = create_app(
     title="Guess Song Game API",
@@ -10,6 +11,9 @@ app = create_app(
     with_static=True
 )
 
+# Users and songs are mounted here too: call them directly instead of over loopback HTTP
+register_local_services({**users_local_handlers, **songs_local_handlers})
+
 if __name__ == "__main__":
     import uvicorn
     # uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True, loop="asyncio")
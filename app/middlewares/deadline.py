@@ -0,0 +1,30 @@
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.shared import metrics
+from app.shared.deadline import DEADLINE_HEADER, deadline_after
+
+
+class DeadlineMiddleware(BaseHTTPMiddleware):
+    """
+    Applies the caller's remaining time budget (x-deadline-ms) to the
+    request, so nested calls and scoring are bounded by it; a request
+    whose budget is already spent is shed without doing any work.
+    Only internal callers are trusted with it (runs inside AuthMiddleware):
+    a player could otherwise starve their own guess of its LLM call.
+    """
+    async def dispatch(self, request, call_next):
+        if getattr(request.state, "auth_type", None) != "internal":
+            return await call_next(request)
+        budget = request.headers.get(DEADLINE_HEADER)
+        try:
+            seconds = int(budget) / 1000 if budget is not None else None
+        except ValueError:
+            seconds = None
+        if seconds is None:
+            return await call_next(request)
+
+        if seconds <= 0:
+            metrics.counter("deadline.shed").inc()
+            return JSONResponse(status_code=504, content={"detail": "Deadline exceeded"})
+        with deadline_after(seconds):
+            return await call_next(request)
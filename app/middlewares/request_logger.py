@@ -1,6 +1,7 @@
 from starlette.middleware.base import BaseHTTPMiddleware
 import time
 import structlog
+from app.shared.timing import start_stage_timings
 
 logger = structlog.get_logger()
 
@@ -18,6 +19,8 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                 actor=actor
             )
 
+        # Handlers record per-stage milliseconds here (see app.shared.timing)
+        stages = start_stage_timings()
         try:
             response = await call_next(request)
             duration = round(time.time() - start, 3)
@@ -28,7 +31,8 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                     method=request.method,
                     url=str(request.url),
                     duration=duration,
-                    actor=actor
+                    actor=actor,
+                    **({"stages": dict(stages)} if stages else {})
                 )
             return response
 
@@ -1,18 +1,23 @@
 from fastapi import Request, HTTPException
 from functools import wraps
 import time
+from typing import Optional
 
 # In-memory tracking per-user per-endpoint
 _request_store = {}
 
-def rate_limited(limit: int = 10, window: int = 60):
+def rate_limited(limit: int = 10, window: int = 60, scope: Optional[str] = None):
+    """
+    :param scope: Bucket name shared by every route using it (defaults to the
+                  route's path, i.e. one bucket per endpoint).
+    """
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             request: Request = kwargs.get("request")
             user_id = getattr(request.state, "user_id", request.client.host)
 
-            key = f"{user_id}:{request.url.path}"
+            key = f"{user_id}:{scope or request.url.path}"
             now = time.time()
             timestamps = _request_store.get(key, [])
             timestamps = [ts for ts in timestamps if now - ts < window]
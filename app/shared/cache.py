@@ -0,0 +1,107 @@
+"""
+Bounded in-process cache with per-entry expiry.
+
+Entries are evicted least-recently-used once either the entry count or the
+approximate memory budget is exceeded, and are dropped lazily once past
+their expiry (by default the next UTC midnight, i.e. game-day rollover).
+With a `shared` backend (see shared_cache.py) the cache is an L1 in front
+of a host-wide L2: misses fall through to it and writes go to both.
+"""
+
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Hashable, Optional, Tuple
+from app.shared import metrics
+from app.shared.shared_cache import SharedCache
+
+
+def next_utc_midnight(now: Optional[float] = None) -> float:
+    """Epoch seconds of the next UTC midnight after `now`."""
+    current = datetime.fromtimestamp(time.time() if now is None else now, tz=timezone.utc)
+    midnight = datetime(current.year, current.month, current.day, tzinfo=timezone.utc) + timedelta(days=1)
+    return midnight.timestamp()
+
+
+def approx_size(obj: Any) -> int:
+    """Rough deep size of keys/values made of tuples, dicts, strings and numbers."""
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(approx_size(o) for o in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(approx_size(k) + approx_size(v) for k, v in obj.items())
+    return sys.getsizeof(obj)
+
+
+class BoundedTTLCache:
+    def __init__(self, name: str, max_entries: int, max_bytes: Optional[int] = None, shared: Optional[SharedCache] = None):
+        """
+        :param shared: Optional host-wide L2. Keys and values must then be
+                       JSON-serializable (tuple keys are stored as lists).
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.bytes = 0
+        # key -> (value, expires_at, size)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._hits = metrics.counter(f"cache.{name}.hits")
+        self._misses = metrics.counter(f"cache.{name}.misses")
+        self._evictions = metrics.counter(f"cache.{name}.evictions")
+        self._expirations = metrics.counter(f"cache.{name}.expirations")
+        self._shared_hits = metrics.counter(f"cache.{name}.shared_hits")
+        metrics.gauge(f"cache.{name}.entries", lambda: len(self._entries))
+        metrics.gauge(f"cache.{name}.bytes", lambda: self.bytes)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] <= time.time():
+            self._drop(key)
+            self._expirations.inc()
+            entry = None
+        if entry is None:
+            found = self.shared.get(self.name, key) if self.shared is not None else None
+            if found is None:
+                self._misses.inc()
+                return default
+            self._shared_hits.inc()
+            self._store(key, *found)
+            return found[0]
+        self._entries.move_to_end(key)
+        self._hits.inc()
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """Stores `value` until `expires_at` (epoch seconds; default next UTC midnight)."""
+        if expires_at is None:
+            expires_at = next_utc_midnight()
+        self._store(key, value, expires_at)
+        if self.shared is not None:
+            self.shared.set(self.name, key, value, expires_at)
+
+    def _store(self, key: Hashable, value: Any, expires_at: float):
+        if key in self._entries:
+            self._drop(key)
+        size = approx_size(key) + approx_size(value)
+        self._entries[key] = (value, expires_at, size)
+        self.bytes += size
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            expired = self._entries[oldest][1] <= time.time()
+            self._drop(oldest)
+            (self._expirations if expired else self._evictions).inc()
+
+    def _drop(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
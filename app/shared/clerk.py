@@ -2,8 +2,9 @@ import os
 from clerk_backend_api import Clerk
 from clerk_backend_api.security import authenticate_request
 from clerk_backend_api.security.types import AuthenticateRequestOptions
-import httpx
 from fastapi import HTTPException
+from app.shared.http_clients import get_client
+from app.shared.cache import BoundedTTLCache
 
 import jwt
 from jwt import PyJWKClient
@@ -33,8 +34,7 @@ async def update_clerk_metadata(user_id: str, metadata: dict):
         "public_metadata": metadata
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.patch(url, json=data, headers=headers)
+    response = await get_client("clerk").patch(url, json=data, headers=headers)
 
     if response.status_code < 200 or response.status_code >= 300:
         raise Exception(
@@ -57,8 +57,7 @@ async def fetch_clerk_user_data(user_id: str):
         "Content-Type": "application/json",
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
+    response = await get_client("clerk").get(url, headers=headers)
     if response.status_code < 200 or response.status_code >= 300:
         raise Exception(
             f"Failed to fetch user {user_id}: {response.status_code} {response.text}")
@@ -70,10 +69,17 @@ CLERK_JWKS_URL = f"https://direct-reptile-68.clerk.accounts.dev/.well-known/jwks
 EXPECTED_ISSUER = f"https://direct-reptile-68.clerk.accounts.dev"
 EXPECTED_AUDIENCE = "http://localhost:5173"  # Or your actual azp
 
+# One client for the process: it caches the key set instead of fetching it per request
+_jwks_client = PyJWKClient(CLERK_JWKS_URL)
+# Verified payloads by token, kept until the token expires
+_verified_tokens = BoundedTTLCache("clerk_jwt.verified", max_entries=10_000)
+
 async def verify_clerk_token(token: str):
+    payload = _verified_tokens.get(token)
+    if payload is not None:
+        return payload
     try:
-        jwks_client = PyJWKClient(CLERK_JWKS_URL)
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
+        signing_key = _jwks_client.get_signing_key_from_jwt(token)
 
         payload = jwt.decode(
             token,
@@ -81,7 +87,9 @@ async def verify_clerk_token(token: str):
             algorithms=["RS256"],
             issuer=EXPECTED_ISSUER
         )
-        return payload
-
     except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Invalid JWT: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail=f"Invalid JWT: {str(e)}")
+
+    if "exp" in payload:
+        _verified_tokens.set(token, payload, payload["exp"])
+    return payload
\ No newline at end of file
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+from app.shared import metrics
+from app.shared.exceptions import ConcurrencyLimitExceededException
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit for calls to a slow upstream.
+
+    Every call that finishes within `latency_target_ms` grows the limit by
+    1/limit (about +1 per limit's worth of calls); a slow or failed call
+    multiplies it by `backoff`. Callers over the limit queue; when the
+    queue already holds `max_queue` callers, or a caller waits longer than
+    its queue timeout, the call is shed with ConcurrencyLimitExceededException
+    so the caller can degrade instead of piling up.
+    """
+    def __init__(
+        self,
+        name: str,
+        initial_limit: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        latency_target_ms: float = 2000,
+        backoff: float = 0.7,
+        max_queue: int = 32,
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target_ms = latency_target_ms
+        self.backoff = backoff
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        metrics.gauge(f"limiter.{name}.limit", lambda: round(self.limit, 2))
+        metrics.gauge(f"limiter.{name}.in_flight", lambda: self.in_flight)
+        metrics.gauge(f"limiter.{name}.queued", lambda: len(self._waiters))
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def has_spare_capacity(self) -> bool:
+        """Whether a call would get a slot right away (nobody is queued)."""
+        return self._has_capacity() and not self._waiters
+
+    async def acquire(self, queue_timeout: Optional[float] = None):
+        if self.has_spare_capacity():
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            metrics.counter(f"limiter.{self.name}.shed_queue_full").inc()
+            raise ConcurrencyLimitExceededException()
+
+        # release() hands the slot over by resolving the future (in_flight already counts it)
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), queue_timeout)
+        except asyncio.TimeoutError:
+            if fut.done():
+                return  # granted right as the timeout fired
+            fut.cancel()
+            self._waiters.remove(fut)
+            metrics.counter(f"limiter.{self.name}.shed_queue_timeout").inc()
+            raise ConcurrencyLimitExceededException()
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.in_flight -= 1
+                self._wake_waiters()
+            else:
+                fut.cancel()
+                self._waiters.remove(fut)
+            raise
+
+    def release(self, latency_ms: float, ok: bool):
+        self.in_flight -= 1
+        if ok and latency_ms <= self.latency_target_ms:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        else:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        while self._waiters and self._has_capacity():
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.in_flight += 1
+                fut.set_result(True)
+
+    @asynccontextmanager
+    async def slot(self, queue_timeout: Optional[float] = None):
+        await self.acquire(queue_timeout)
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.release((time.perf_counter() - start) * 1000, ok)
@@ -0,0 +1,58 @@
+"""
+Per-request deadline carried in a contextvar, so nested calls can bound
+their own timeouts by whatever time the request has left.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Remaining budget in milliseconds, sent with internal calls (see DeadlineMiddleware)
+DEADLINE_HEADER = "x-deadline-ms"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+def deadline_after(seconds: float):
+    """Sets a deadline `seconds` from now (never later than an enclosing one)."""
+    return deadline_at(time.monotonic() + seconds)
+
+
+@contextmanager
+def deadline_at(deadline: float):
+    """Sets a deadline at time.monotonic() value `deadline` (never later than an enclosing one)."""
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def cleared():
+    """Runs the block without a deadline (work shared by several requests sets its own)."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current deadline (None when there is none)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def bounded(timeout: Optional[float]) -> Optional[float]:
+    """`timeout` capped by the time left on the current deadline."""
+    left = remaining()
+    if left is None:
+        return timeout
+    return left if timeout is None else min(timeout, left)
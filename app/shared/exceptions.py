@@ -43,3 +43,18 @@ class NoGuessesLeftException(AppException):
     """Raised when a user has no guesses left for the day."""
     def __init__(self, message: str = "No guesses left for today", status_code: int = 403):
         super().__init__(message, status_code)
+
+class ScoringTimeoutException(AppException):
+    """Raised when scoring a guess takes longer than allowed."""
+    def __init__(self, message: str = "Scoring the guess took too long, please try again", status_code: int = 504):
+        super().__init__(message, status_code)
+
+class ConcurrencyLimitExceededException(AppException):
+    """Raised when a call is shed because its upstream's concurrency limit and queue are full."""
+    def __init__(self, message: str = "Service is overloaded, please try again", status_code: int = 503):
+        super().__init__(message, status_code)
+
+class BatchTooLargeException(AppException):
+    """Raised when a batch request carries more items than allowed."""
+    def __init__(self, message: str = "Too many items in batch", status_code: int = 413):
+        super().__init__(message, status_code)
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+from app.shared import metrics
+
+
+class Hedger:
+    """
+    Hedged requests: if the first attempt has not answered after the
+    `percentile` latency of recent successful attempts, an identical second
+    attempt is started and whichever succeeds first wins (the other one is
+    cancelled). Until `min_samples` latencies are known, `initial_delay_ms`
+    is used. An attempt that fails before the hedge delay is not retried.
+    """
+    def __init__(
+        self,
+        name: str,
+        percentile: float = 0.95,
+        min_delay_ms: float = 50,
+        initial_delay_ms: float = 1000,
+        min_samples: int = 20,
+        enabled: bool = True,
+    ):
+        self.name = name
+        self.percentile = percentile
+        self.min_delay_ms = min_delay_ms
+        self.initial_delay_ms = initial_delay_ms
+        self.min_samples = min_samples
+        self.enabled = enabled
+        self._latency = metrics.histogram(f"hedge.{name}.latency_ms")
+        metrics.gauge(f"hedge.{name}.delay_ms", lambda: round(self.delay_ms(), 1))
+
+    def delay_ms(self) -> float:
+        if self._latency.count < self.min_samples:
+            return self.initial_delay_ms
+        return max(self.min_delay_ms, self._latency.percentile(self.percentile))
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        :param timeout: Overall bound across both attempts; on expiry both are
+                        cancelled and asyncio.TimeoutError is raised.
+        """
+        if timeout is not None and timeout <= 0:
+            raise asyncio.TimeoutError()
+        return await asyncio.wait_for(self._race(fn), timeout)
+
+    async def _attempt(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        result = await fn()
+        self._latency.observe((time.perf_counter() - start) * 1000)
+        return result
+
+    async def _race(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        primary = asyncio.ensure_future(self._attempt(fn))
+        pending = {primary}
+        try:
+            if not self.enabled:
+                return await primary
+            done, _ = await asyncio.wait(pending, timeout=self.delay_ms() / 1000)
+            if done:
+                return primary.result()
+
+            metrics.counter(f"hedge.{self.name}.hedged").inc()
+            hedge = asyncio.ensure_future(self._attempt(fn))
+            pending.add(hedge)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            metrics.counter(f"hedge.{self.name}.hedge_wins").inc()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
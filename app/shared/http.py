@@ -1,3 +1,4 @@
+import asyncio
 import httpx
 import os
 from typing import Optional, Dict, Any
@@ -5,8 +6,15 @@ import jwt
 import uuid
 import time
 from dotenv import load_dotenv
-from app.shared.exceptions import InternalJWTExpiredException, InvalidInternalJWTException
+from app.shared.exceptions import AppException, InternalJWTExpiredException, InvalidInternalJWTException
+from app.shared.service_locator import resolve_local_service
+from app.shared import metrics
+from app.shared.cache import BoundedTTLCache
+from app.shared import deadline
+from app.shared.resilience import get_breaker, backoff_delay
+from app.shared.http_clients import get_client
 from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
 
 load_dotenv()
 
@@ -15,6 +23,23 @@ INTERNAL_KEY = os.getenv("INTERNAL_API_KEY", "super-secret-key")
 MICRO_JWT_SECRET = os.getenv("MICRO_JWT_SECRET", "micro-jwt-secret")
 MICRO_JWT_ALGORITHM = "HS256"
 IS_RUNNING_LOCAL = os.getenv("IS_RUNNING_LOCAL") == "true"
+INTERNAL_SERVICE_ID = os.getenv("INTERNAL_SERVICE_ID", "api")
+INTERNAL_JWT_TTL_SECONDS = int(os.getenv("INTERNAL_JWT_TTL_SECONDS", "300"))
+INTERNAL_JWT_REFRESH_MARGIN_SECONDS = int(os.getenv("INTERNAL_JWT_REFRESH_MARGIN_SECONDS", "30"))
+
+# Whole-call budget (all attempts) and per-attempt timeout
+INTERNAL_CALL_BUDGET_SECONDS = float(os.getenv("INTERNAL_CALL_BUDGET_SECONDS", "300" if IS_RUNNING_LOCAL else "20"))
+INTERNAL_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("INTERNAL_ATTEMPT_TIMEOUT_SECONDS", "300" if IS_RUNNING_LOCAL else "5"))
+INTERNAL_RETRY_ATTEMPTS = int(os.getenv("INTERNAL_RETRY_ATTEMPTS", "3"))
+INTERNAL_RETRY_BACKOFF_SECONDS = float(os.getenv("INTERNAL_RETRY_BACKOFF_SECONDS", "0.1"))
+INTERNAL_RETRY_BACKOFF_CAP_SECONDS = float(os.getenv("INTERNAL_RETRY_BACKOFF_CAP_SECONDS", "1"))
+# Only idempotent methods are retried
+INTERNAL_RETRY_METHODS = set(os.getenv("INTERNAL_RETRY_METHODS", "GET,HEAD,PUT,DELETE").upper().split(","))
+_RETRY_STATUSES = {502, 503, 504}
+
+# Signed tokens by (service, impersonated user), and verified payloads by token
+_signed_tokens = BoundedTTLCache("internal_jwt.signed", max_entries=10_000)
+_verified_tokens = BoundedTTLCache("internal_jwt.verified", max_entries=10_000)
 
 
 def sign_internal_jwt(payload: Optional[Dict[str, Any]] = None, expires_in: int = 300) -> str:
@@ -37,19 +62,42 @@ def sign_internal_jwt(payload: Optional[Dict[str, Any]] = None, expires_in: int
     return token
 
 
+def internal_auth_token(user_id: Optional[str] = None) -> str:
+    """
+    Identity-only internal JWT (this service, optionally impersonating
+    `user_id`), reused until shortly before it expires.
+    """
+    key = (INTERNAL_SERVICE_ID, user_id)
+    token = _signed_tokens.get(key)
+    if token is None:
+        claims = {"service": INTERNAL_SERVICE_ID}
+        if user_id:
+            claims["impersonated_user_id"] = user_id
+        token = sign_internal_jwt(claims, INTERNAL_JWT_TTL_SECONDS)
+        refresh_at = time.time() + INTERNAL_JWT_TTL_SECONDS - INTERNAL_JWT_REFRESH_MARGIN_SECONDS
+        _signed_tokens.set(key, token, refresh_at)
+    return token
+
+
 def verify_internal_jwt(token: str) -> Dict[str, Any]:
     """
     Verify a JWT for internal microservice communication.
+    Verified payloads are cached by token until the token's expiry.
     :param token: JWT as string.
     :return: Decoded payload if valid, raises jwt exceptions if invalid.
     """
+    payload = _verified_tokens.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, MICRO_JWT_SECRET, algorithms=[MICRO_JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise InternalJWTExpiredException()
     except jwt.InvalidTokenError:
         raise InvalidInternalJWTException()
+    if "exp" in payload:
+        _verified_tokens.set(token, payload, payload["exp"])
+    return payload
 
 
 async def call_internal_service(
@@ -59,9 +107,26 @@ async def call_internal_service(
     params: Optional[Dict[str, Any]] = None,
     headers: Optional[Dict[str, str]] = None
 ) -> Any:
+    local = resolve_local_service(method, service_url)
+    if local is not None:
+        handler, path_params = local
+        metrics.counter("internal_calls.in_process").inc()
+        try:
+            result = await handler(body, {**(params or {}), **path_params})
+        except AppException as e:
+            # Same failure shape as the HTTP path
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=f"Failed to call {method.upper()} {service_url}: {e.message}"
+            )
+        return jsonable_encoder(result)
+
+    metrics.counter("internal_calls.http").inc()
+    method = method.upper()
     full_url = f"{USER_SERVICE_URL}{service_url}"
     trace_id = str(uuid.uuid4())
-    internal_jwt = sign_internal_jwt({ **(body or {}), **(params or {}) })
+    user_id = (params or {}).get("user_id") or (body or {}).get("user_id")
+    internal_jwt = internal_auth_token(user_id)
     request_headers = {
         "x-trace-id": trace_id,
         "x-internal-key": INTERNAL_KEY,
@@ -69,20 +134,69 @@ async def call_internal_service(
         **(headers or {})
     }
 
-    timeout = httpx.Timeout(300.0 if IS_RUNNING_LOCAL else 20.0, connect=5.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.request(
-            method=method.upper(),
-            url=full_url,
-            headers=request_headers,
-            json=body if method.upper() in {"POST", "PUT", "PATCH"} else None,
-            params=params
-        )
+    # One breaker per internal service (first path segment: users, songs, ...)
+    breaker = get_breaker(f"internal.{service_url.strip('/').split('/', 1)[0]}")
+    attempts = INTERNAL_RETRY_ATTEMPTS if method in INTERNAL_RETRY_METHODS else 1
+    last_error = None
 
-        if response.status_code >= 400:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Failed to call {method.upper()} {service_url}: {response.text}"
-            )
+    with deadline.deadline_after(INTERNAL_CALL_BUDGET_SECONDS):
+        for attempt in range(attempts):
+            if attempt:
+                delay = backoff_delay(attempt - 1, INTERNAL_RETRY_BACKOFF_SECONDS, INTERNAL_RETRY_BACKOFF_CAP_SECONDS)
+                if delay >= deadline.remaining():
+                    break
+                metrics.counter("internal_calls.retries").inc()
+                await asyncio.sleep(delay)
+            left = deadline.remaining()
+            if left <= 0:
+                break
+            if not breaker.allow():
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Failed to call {method} {service_url}: circuit open"
+                )
+
+            # The callee sheds the request instead of working past our deadline
+            request_headers[deadline.DEADLINE_HEADER] = str(int(left * 1000))
+            attempt_timeout = min(INTERNAL_ATTEMPT_TIMEOUT_SECONDS, left)
+            try:
+                response = await get_client("internal").request(
+                    method=method,
+                    url=full_url,
+                    headers=request_headers,
+                    json=body if method in {"POST", "PUT", "PATCH"} else None,
+                    params=params,
+                    timeout=httpx.Timeout(attempt_timeout, connect=min(5.0, attempt_timeout))
+                )
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                last_error = e
+                continue
+            except BaseException:
+                breaker.abandon()
+                raise
 
-        return response.json()
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if response.status_code in _RETRY_STATUSES:
+                last_error = response
+                continue
+            if response.status_code >= 400:
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Failed to call {method} {service_url}: {response.text}"
+                )
+            return response.json()
+
+    if isinstance(last_error, httpx.Response):
+        raise HTTPException(
+            status_code=last_error.status_code,
+            detail=f"Failed to call {method} {service_url}: {last_error.text}"
+        )
+    timed_out = last_error is None or isinstance(last_error, httpx.TimeoutException)
+    raise HTTPException(
+        status_code=504 if timed_out else 503,
+        detail=f"Failed to call {method} {service_url}: {repr(last_error) if last_error else 'deadline exceeded'}"
+    )
@@ -0,0 +1,112 @@
+"""
+Long-lived, pooled HTTP clients, one per upstream.
+
+Every outbound call used to open its own httpx.AsyncClient, paying a TCP
+(and TLS) handshake per request. Clients here are created on first use,
+keep their connections alive between calls, and are closed by the app's
+lifespan on shutdown. Each upstream has its own pool, so a slow third
+party cannot use up the connections internal calls need.
+
+HTTP/2 is used for https upstreams when HTTP2_ENABLED is set and the
+optional `h2` package is installed.
+"""
+
+import asyncio
+import os
+from typing import Dict, Optional, Tuple
+import httpx
+import structlog
+from app.shared import metrics
+
+logger = structlog.get_logger()
+
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false") == "true"
+
+try:
+    import h2  # noqa: F401
+    _H2_AVAILABLE = True
+except ImportError:
+    _H2_AVAILABLE = False
+
+# Default timeout per upstream; calls can still pass their own
+_TIMEOUTS = {
+    "internal": httpx.Timeout(300.0 if os.getenv("IS_RUNNING_LOCAL") == "true" else 20.0, connect=5.0),
+    "clerk": httpx.Timeout(5.0),
+    "paypal": httpx.Timeout(10.0),
+}
+
+# name -> (client, event loop it was created on)
+_clients: Dict[str, Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """Returns the shared client for upstream `name`, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    found = _clients.get(name)
+    if found is not None and found[1] is loop and not found[0].is_closed:
+        return found[0]
+
+    # Connections are bound to the loop that opened them (scripts and tests
+    # may run several loops in turn), so a client from another loop is replaced
+    client = httpx.AsyncClient(
+        timeout=_TIMEOUTS.get(name, httpx.Timeout(10.0)),
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        http2=HTTP2_ENABLED and _H2_AVAILABLE,
+        event_hooks={"request": [_request_hook(name)]},
+    )
+    _clients[name] = (client, loop)
+    metrics.gauge(f"http_pool.{name}", lambda: pool_stats(name))
+    return client
+
+
+def _request_hook(name: str):
+    requests = metrics.counter(f"http_pool.{name}.requests")
+    connects = metrics.counter(f"http_pool.{name}.connects")
+
+    async def trace(event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            connects.inc()
+
+    async def hook(request: httpx.Request):
+        requests.inc()
+        request.extensions["trace"] = trace
+
+    return hook
+
+
+def pool_stats(name: str) -> Optional[Dict[str, int]]:
+    """Open / idle / in-use connections and queued requests of a client's pool."""
+    found = _clients.get(name)
+    if found is None or found[0].is_closed:
+        return None
+    pool = getattr(found[0]._transport, "_pool", None)  # httpcore.AsyncConnectionPool
+    if pool is None:
+        return None
+    connections = list(pool.connections)
+    idle = sum(1 for c in connections if c.is_idle())
+    return {
+        "open": len(connections),
+        "idle": idle,
+        "in_use": len(connections) - idle,
+        "queued": len(getattr(pool, "_requests", ())),
+    }
+
+
+async def close_clients():
+    """Closes every client; called on app shutdown."""
+    clients = list(_clients.items())
+    _clients.clear()
+    for name, (client, loop) in clients:
+        if loop is not asyncio.get_running_loop():
+            continue  # its loop is gone; nothing can be awaited on it
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning("Failed to close HTTP client", upstream=name, error=repr(e))
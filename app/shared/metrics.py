@@ -0,0 +1,85 @@
+"""
+Tiny in-process metrics registry (counters, gauges, latency histograms).
+Values are per worker; they are exposed through the internal metrics route.
+"""
+
+import threading
+from collections import deque
+from typing import Callable, Dict, Any
+
+_RESERVOIR_SIZE = 1024
+
+_lock = threading.Lock()
+_counters: Dict[str, "Counter"] = {}
+_histograms: Dict[str, "Histogram"] = {}
+_gauges: Dict[str, Callable[[], Any]] = {}
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Histogram:
+    """Keeps totals plus the most recent samples for percentiles."""
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples = deque(maxlen=_RESERVOIR_SIZE)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self._samples.append(value)
+
+    def percentile(self, q: float) -> float:
+        samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        idx = min(len(samples) - 1, int(round(q * (len(samples) - 1))))
+        return samples[idx]
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "p50": round(self.percentile(0.50), 3),
+            "p95": round(self.percentile(0.95), 3),
+            "p99": round(self.percentile(0.99), 3),
+        }
+
+
+def counter(name: str) -> Counter:
+    with _lock:
+        return _counters.setdefault(name, Counter())
+
+
+def histogram(name: str) -> Histogram:
+    with _lock:
+        return _histograms.setdefault(name, Histogram())
+
+
+def gauge(name: str, fn: Callable[[], Any]):
+    """Registers a callback that is evaluated on every snapshot."""
+    with _lock:
+        _gauges[name] = fn
+
+
+def snapshot() -> Dict[str, Any]:
+    gauges = {}
+    for name, fn in list(_gauges.items()):
+        try:
+            gauges[name] = fn()
+        except Exception as e:
+            gauges[name] = repr(e)
+    return {
+        "counters": {name: c.value for name, c in _counters.items()},
+        "histograms": {name: h.to_dict() for name, h in _histograms.items()},
+        "gauges": gauges,
+    }
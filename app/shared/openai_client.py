@@ -0,0 +1,7 @@
+import os
+from openai import AsyncOpenAI
+
+# Shared by the embedding and chat callers so they reuse one connection pool.
+# Built even without a key so the scorer can be imported offline (local
+# embedding backend, benchmarks); requests then fail with an auth error.
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY") or "not-configured")
@@ -0,0 +1,86 @@
+"""
+Retry backoff and per-upstream circuit breakers for outbound calls.
+
+A breaker opens after `failure_threshold` consecutive failures and then
+rejects calls outright for `open_seconds`, so requests fail fast instead
+of each waiting out a timeout against an upstream that is down. After
+that one probe call is let through (half-open): success closes the
+breaker, failure opens it again.
+"""
+
+import os
+import random
+import time
+from typing import Dict
+from app.shared import metrics
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "10"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._opened = metrics.counter(f"breaker.{name}.opened")
+        self._rejected = metrics.counter(f"breaker.{name}.rejected")
+        metrics.gauge(f"breaker.{name}", lambda: {"state": self.current_state(), "failures": self.failures})
+
+    def current_state(self) -> str:
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            return HALF_OPEN
+        return self.state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; a rejected call is counted."""
+        state = self.current_state()
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self.state = HALF_OPEN
+            self._probing = True
+            return True
+        self._rejected.inc()
+        return False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self._opened.inc()
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def abandon(self):
+        """For an allowed call that ended without an outcome (cancelled): frees the probe slot."""
+        self._probing = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,59 @@
+"""
+In-process dispatch for internal service calls.
+
+When the target service's routes are mounted in this same process (the
+monolith deployment, see app/main.py), call_internal_service hands the call
+straight to the service function registered here instead of doing a
+loopback HTTP hop (JWT sign/verify, middleware stack, JSON round trip).
+Services deployed on their own register nothing and keep going over HTTP.
+
+Handlers take (body, params) and return what the HTTP route would have
+returned; path templates like "/songs/{song_id}" put the path values into
+params. Results are JSON-encoded like the HTTP response would have been.
+"""
+
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+INTERNAL_CALLS_IN_PROCESS = os.getenv("INTERNAL_CALLS_IN_PROCESS", "true").lower() == "true"
+
+LocalHandler = Callable[[Optional[Dict[str, Any]], Dict[str, Any]], Awaitable[Any]]
+
+_exact: Dict[Tuple[str, str], LocalHandler] = {}
+_templated: Dict[Tuple[str, Tuple[str, ...]], LocalHandler] = {}
+
+
+def register_local_service(method: str, path: str, handler: LocalHandler):
+    key = method.upper()
+    if "{" in path:
+        _templated[(key, tuple(path.strip("/").split("/")))] = handler
+    else:
+        _exact[(key, path.rstrip("/") or "/")] = handler
+
+
+def register_local_services(handlers: Dict[Tuple[str, str], LocalHandler]):
+    for (method, path), handler in handlers.items():
+        register_local_service(method, path, handler)
+
+
+def resolve_local_service(method: str, path: str) -> Optional[Tuple[LocalHandler, Dict[str, str]]]:
+    """Returns (handler, path params) when `path` is served in-process, else None."""
+    if not INTERNAL_CALLS_IN_PROCESS:
+        return None
+    key = method.upper()
+    handler = _exact.get((key, path.rstrip("/") or "/"))
+    if handler is not None:
+        return handler, {}
+    parts = path.strip("/").split("/")
+    for (m, template), handler in _templated.items():
+        if m != key or len(template) != len(parts):
+            continue
+        path_params = {}
+        for expected, actual in zip(template, parts):
+            if expected.startswith("{") and expected.endswith("}"):
+                path_params[expected[1:-1]] = actual
+            elif expected != actual:
+                break
+        else:
+            return handler, path_params
+    return None
@@ -0,0 +1,144 @@
+"""
+Host-local cache shared by every worker process on the machine.
+
+A small SQLite database in WAL mode (concurrent readers, one writer at a
+time, no server), used as L2 behind the per-process BoundedTTLCache: a
+value computed or fetched by one uvicorn worker is a local read for the
+others instead of another Firestore query or LLM call. Values are JSON.
+Calls are synchronous; they are local file reads/writes that take tens of
+microseconds, well below the cost of an executor hop. They only wait
+SHARED_CACHE_BUSY_TIMEOUT_MS for another worker's write lock: past that a
+read is a miss and a write is dropped, rather than the event loop stalling.
+Expired and excess rows are pruned by a periodic task in a thread
+(prune_periodically), never on the request path.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any, Optional, Tuple
+import structlog
+from app.shared import metrics
+
+logger = structlog.get_logger()
+
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", os.path.join(tempfile.gettempdir(), "guess_song_shared_cache.sqlite3"))
+SHARED_CACHE_MAX_ROWS = int(os.getenv("SHARED_CACHE_MAX_ROWS", "200000"))
+SHARED_CACHE_BUSY_TIMEOUT_MS = int(os.getenv("SHARED_CACHE_BUSY_TIMEOUT_MS", "20"))
+SHARED_CACHE_PRUNE_INTERVAL_SECONDS = float(os.getenv("SHARED_CACHE_PRUNE_INTERVAL_SECONDS", "300"))
+# Pruning runs off the event loop, so it can wait for the lock much longer
+_PRUNE_BUSY_TIMEOUT_SECONDS = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+class SharedCache:
+    def __init__(self, path: str, max_rows: int = SHARED_CACHE_MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per process: a connection inherited through fork() must not be reused
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = self._connect(SHARED_CACHE_BUSY_TIMEOUT_MS / 1000)
+            self._pid = os.getpid()
+        return self._conn
+
+    def _connect(self, busy_timeout: float) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(_SCHEMA)
+        return conn
+
+    def get(self, namespace: str, key: Any) -> Optional[Tuple[Any, float]]:
+        """Returns (value, expires_at), or None when absent, expired or unreadable."""
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, json.dumps(key), time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            metrics.counter("shared_cache.errors").inc()
+            logger.error("Shared cache read failed", namespace=namespace, error=repr(e))
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, namespace: str, key: Any, value: Any, expires_at: float):
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, json.dumps(key), json.dumps(value), expires_at),
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            # TypeError/ValueError: not JSON-serializable, the value just stays process-local
+            metrics.counter("shared_cache.errors").inc()
+            logger.error("Shared cache write failed", namespace=namespace, error=repr(e))
+
+    def claim(self, namespace: str, key: Any, expires_at: float) -> bool:
+        """
+        Atomically takes `key` unless another process holds an unexpired claim.
+        Used to run once-per-host jobs from whichever worker gets there first.
+        On errors the claim is granted, so the job still runs (per process).
+        """
+        try:
+            cursor = self._connection().execute(
+                "INSERT INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE cache.expires_at <= ?",
+                (namespace, json.dumps(key), json.dumps(os.getpid()), expires_at, time.time()),
+            )
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            metrics.counter("shared_cache.errors").inc()
+            logger.error("Shared cache claim failed", namespace=namespace, error=repr(e))
+            return True
+
+    def prune(self):
+        """
+        Deletes expired rows, then the oldest ones while over max_rows.
+        Blocking: run it in a thread (it has its own connection for that).
+        """
+        conn = self._connect(_PRUNE_BUSY_TIMEOUT_SECONDS)
+        try:
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            # Still over budget: drop the oldest inserts
+            conn.execute(
+                "DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache ORDER BY rowid LIMIT "
+                "max(0, (SELECT count(*) FROM cache) - ?))",
+                (self.max_rows,),
+            )
+        finally:
+            conn.close()
+
+
+shared_cache = SharedCache(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None
+
+
+async def prune_periodically(interval: float = SHARED_CACHE_PRUNE_INTERVAL_SECONDS):
+    """Prunes `shared_cache` every `interval` seconds (one worker per host each time) until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        if shared_cache is None or not shared_cache.claim("maintenance", "prune", time.time() + interval / 2):
+            continue
+        try:
+            await asyncio.to_thread(shared_cache.prune)
+        except sqlite3.Error as e:
+            metrics.counter("shared_cache.errors").inc()
+            logger.error("Shared cache prune failed", error=repr(e))
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from app.shared import metrics, deadline
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one execution: the first
+    caller starts the work, everyone arriving before it finishes awaits the
+    same future and gets the same result or exception.
+
+    With `cancel_abandoned`, the work is cancelled once every waiter has been
+    cancelled (nobody wants the result any more); otherwise it runs to the end.
+    """
+    def __init__(self, name: str, cancel_abandoned: bool = False):
+        self.name = name
+        self.cancel_abandoned = cancel_abandoned
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        metrics.gauge(f"single_flight.{name}.inflight", lambda: len(self._inflight))
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        :param timeout: Bound on the shared execution for this key; on expiry
+                        every waiter gets asyncio.TimeoutError and the key is freed.
+        """
+        fut = self._inflight.get(key)
+        if fut is None:
+            metrics.counter(f"single_flight.{self.name}.executions").inc()
+            fut = asyncio.ensure_future(self._run(key, fn, timeout))
+            self._inflight[key] = fut
+        else:
+            metrics.counter(f"single_flight.{self.name}.shared").inc()
+        # A waiter being cancelled (client went away) must not cancel the shared work
+        if not self.cancel_abandoned:
+            return await asyncio.shield(fut)
+        self._waiters[fut] = self._waiters.get(fut, 0) + 1
+        try:
+            return await asyncio.shield(fut)
+        finally:
+            self._waiters[fut] -= 1
+            if not self._waiters[fut]:
+                del self._waiters[fut]
+                if not fut.done():
+                    # The last waiter was cancelled; free the key first so a caller
+                    # arriving now starts fresh work instead of joining a cancelled future
+                    metrics.counter(f"single_flight.{self.name}.abandoned").inc()
+                    if self._inflight.get(key) is fut:
+                        del self._inflight[key]
+                    fut.cancel()
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float]):
+        # The task inherits the first caller's context; its deadline must not cut
+        # the work short for every other waiter (`timeout` bounds it instead)
+        try:
+            with deadline.cleared():
+                if timeout:
+                    return await asyncio.wait_for(fn(), timeout)
+                return await fn()
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
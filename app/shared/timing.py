@@ -0,0 +1,46 @@
+"""
+Per-request stage timings.
+
+A caller that wants a breakdown calls start_stage_timings() and gets back
+a dict; code on the same async path wraps its stages in timed_stage(name)
+and the elapsed milliseconds accumulate into that dict. When nobody
+started a collection, timed_stage is a no-op.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+_stage_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+
+
+def start_stage_timings() -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    _stage_timings.set(timings)
+    return timings
+
+
+def current_stage_timings() -> Optional[Dict[str, float]]:
+    return _stage_timings.get()
+
+
+@contextmanager
+def timed_stage(name: str):
+    timings = _stage_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(timings.get(name, 0.0) + (time.perf_counter() - start) * 1000, 3)
+
+
+async def timed(name: str, awaitable: Awaitable[T]) -> T:
+    """Awaits `awaitable` inside timed_stage(name); handy for tasks started concurrently."""
+    with timed_stage(name):
+        return await awaitable
@@ -3,20 +3,15 @@ from google.cloud import firestore
 from datetime import datetime, timedelta
 import random
 from app.shared.exceptions import NoUnusedSongsException
+from app.shared.cache import BoundedTTLCache
+from app.shared.shared_cache import shared_cache
 
 db = get_firestore_client()
 songs_ref = db.collection("songs")
 
-# Simple in-memory cache
-_daily_song_cache = {
-    "value": None,
-    "expires_at": None
-}
-
-def _next_utc_midnight():
-    now = datetime.utcnow()
-    tomorrow = now + timedelta(days=1)
-    return datetime(tomorrow.year, tomorrow.month, tomorrow.day)
+# Date -> {"today", "yesterday"}; per-process L1 over the host-shared cache,
+# expiring at the next UTC midnight
+_daily_song_cache = BoundedTTLCache("daily_song", max_entries=2, shared=shared_cache)
 
 async def get_song_by_id(song_id: str):
     doc = await songs_ref.document(song_id).get()
@@ -35,14 +30,13 @@ async def get_song_by_date(date_str: str):
     return None
 
 async def get_daily_song():
-    global _daily_song_cache
     now = datetime.utcnow()
+    today_str = now.date().isoformat()
 
-    # Check if cached value is still valid
-    if _daily_song_cache.get("value") and _daily_song_cache.get("expires_at") > now:
-        return _daily_song_cache["value"]
+    cached = _daily_song_cache.get(today_str)
+    if cached:
+        return cached
 
-    today_str = now.date().isoformat()
     yesterday_str = (now.date() - timedelta(days=1)).isoformat()
 
     # Fetch today's song
@@ -67,13 +61,16 @@ async def get_daily_song():
         "yesterday": song_yesterday
     }
 
-    _daily_song_cache = {
-        "value": result,
-        "expires_at": _next_utc_midnight()
-    }
+    _daily_song_cache.set(today_str, result)
+    _start_score_warmup(song_today)
 
     return result
 
+def _start_score_warmup(song: dict):
+    # Imported lazily: the guesses domain depends on songs, not the other way round
+    from app.guesses.warmup import start_warmup
+    start_warmup(song)
+
 async def get_random_song():
     docs = [doc async for doc in songs_ref.stream()]
     if not docs:
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List
 
 class Song(BaseModel):
     id: str
@@ -7,3 +8,6 @@ class Song(BaseModel):
     instrument: str
     clip_url: str
     credit_clip: str
+    # Optional alternate spellings / stylizations / translations players may type
+    aliases: List[str] = []
+    artist_aliases: List[str] = []
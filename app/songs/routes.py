@@ -42,5 +42,19 @@ async def get_by_id(song_id: str):
     """
     Returns metadata for a specific song.
     """
-    song = get_song(song_id)
-    return JSONResponse(song)
\ No newline at end of file
+    song = await get_song(song_id)
+    return JSONResponse(song)
+
+
+# In-process equivalents of the internal routes above (registered in app/main.py);
+# internal callers are machines, so /winner always passes its identity check
+async def _local_winner(body, params):
+    return await get_winner_song()
+
+async def _local_get_by_id(body, params):
+    return await get_song(params["song_id"])
+
+local_handlers = {
+    ("GET", "/songs/winner"): _local_winner,
+    ("GET", "/songs/{song_id}"): _local_get_by_id,
+}
@@ -34,6 +34,8 @@ async def get_winner_song() -> Dict:
             "artist": song_today.get("artist"),
             "clip_url": song_today.get("clip_url"),
             "credit_clip": song_today.get("credit_clip"),
+            "aliases": song_today.get("aliases") or [],
+            "artist_aliases": song_today.get("artist_aliases") or [],
         }
 
     return song_to_return
@@ -20,4 +20,24 @@ async def get(request: Request, user_id: str = Depends(get_current_user_id)):
 
 @router.put("", response_model=UserResponse)
 async def update(update_req: UserUpdateRequest, user_id: str = Depends(get_current_user_id),  _ = Depends(require_internal_service)):
-    return await update_user_data(user_id, update_req)
\ No newline at end of file
+    return await update_user_data(user_id, update_req)
+
+
+# In-process equivalents of the internal routes above (registered in app/main.py).
+# Over HTTP the user id comes from the internal JWT, which call_internal_service
+# takes from the same params/body field.
+def _caller_user_id(body, params) -> str:
+    return (params or {}).get("user_id") or (body or {}).get("user_id")
+
+# Validated through UserResponse like the routes' response_model, so both paths return the same shape.
+async def _local_get(body, params):
+    return UserResponse.model_validate(await get_or_create_user(_caller_user_id(body, params)))
+
+async def _local_update(body, params):
+    user = await update_user_data(_caller_user_id(body, params), UserUpdateRequest.model_validate(body or {}))
+    return UserResponse.model_validate(user)
+
+local_handlers = {
+    ("GET", "/users"): _local_get,
+    ("PUT", "/users"): _local_update,
+}
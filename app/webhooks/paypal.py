@@ -9,7 +9,8 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives.serialization import load_pem_public_key
 from app.shared.http import call_internal_service
-import base64, zlib, httpx
+import base64, zlib
+from app.shared.http_clients import get_client
 from datetime import datetime, timedelta
 from app.users.model import get_user_by_id, update_user_fields
 
@@ -47,10 +48,9 @@ async def verify_paypal_signature(raw_body: bytes, headers: dict, webhook_id: st
         message = f"{transmission_id}|{transmission_time}|{webhook_id}|{crc32_decimal}"
 
         # Fetch and parse the X.509 cert, extract public key
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(cert_url)
-            resp.raise_for_status()
-            cert_pem = resp.text
+        resp = await get_client("paypal").get(cert_url)
+        resp.raise_for_status()
+        cert_pem = resp.text
         cert = x509.load_pem_x509_certificate(cert_pem.encode("utf-8"))
         public_key = cert.public_key()
 
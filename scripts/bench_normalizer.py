@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: original regex-chain norm() vs app.guesses.normalizer.
+
+Builds a corpus of guess-like strings from the song catalog (real titles and
+artists in the shapes players type them: casing, "by", dashes, versions,
+accents, ampersands, stray punctuation), checks both implementations agree
+on every string, then reports throughput.
+
+    python scripts/bench_normalizer.py [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.guesses.normalizer import normalize, _normalize  # noqa: E402
+
+SONGS_FILE = os.path.join("app", "static", "songs.json")
+
+
+def legacy_norm(s: str) -> str:
+    """The pre-normalizer implementation, kept verbatim as the reference."""
+    if not s:
+        return ""
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = s.lower()
+    s = re.sub(r"\(.*?\)|\[.*?\]", " ", s)
+    s = re.sub(r"\b(remaster(?:ed)?|live|acoustic|feat\.?|ft\.?|version|edit|mix|rmx)\b", " ", s)
+    s = re.sub(r"\b(&|and)\b", " and ", s)
+    s = re.sub(r"[^a-z0-9\s]", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def build_corpus(seed: int = 7):
+    with open(SONGS_FILE, "r") as f:
+        songs = json.load(f)
+    rnd = random.Random(seed)
+    corpus = []
+    for song in songs:
+        title, artist = song["title"], song["artist"]
+        corpus += [
+            title,
+            artist,
+            title.lower(),
+            f"{title} by {artist}",
+            f"{artist} - {title}",
+            f"{title.upper()} (Remastered 2011)",
+            f"{title} [Live] feat. {artist}",
+            f"  {title}!!  ",
+            f"{artist.replace(' ', '&')}",
+            f"{title} – {artist} / acoustic version",
+            "".join(ch + "\u0301" if ch in "aeiou" and rnd.random() < 0.3 else ch for ch in title),
+        ]
+    return corpus
+
+
+def _throughput(fn, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for s in corpus:
+            fn(s)
+    elapsed = time.perf_counter() - start
+    return repeat * len(corpus) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = build_corpus()
+    mismatches = [s for s in corpus if legacy_norm(s) != normalize(s)]
+    if mismatches:
+        print(f"❌ {len(mismatches)} mismatches, e.g. {mismatches[0]!r}")
+        sys.exit(1)
+
+    legacy = _throughput(legacy_norm, corpus, args.repeat)
+    uncached = _throughput(_normalize, corpus, args.repeat)
+    cached = _throughput(normalize, corpus, args.repeat)
+    print(f"corpus: {len(corpus)} strings x {args.repeat}")
+    print(f"legacy norm():        {legacy:12,.0f} strings/s")
+    print(f"normalizer (no memo): {uncached:12,.0f} strings/s  ({uncached / legacy:.1f}x)")
+    print(f"normalizer (memo):    {cached:12,.0f} strings/s  ({cached / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
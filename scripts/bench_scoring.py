@@ -0,0 +1,133 @@
+"""
+Scoring benchmark: runs a labeled corpus of (song, guess, expected band)
+cases through get_similarity_score and reports latency, per-stage timings,
+throughput, which tier settled each guess, and accuracy against the bands.
+
+By default OpenAI is replaced by scripts/fake_openai.py with a configurable
+latency, so the run needs no network and no key. Point --base-url at the
+real API (with OPENAI_API_KEY set) to check verdicts against real models.
+
+    python scripts/bench_scoring.py --latency-ms 150 --jitter-ms 50 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+CORPUS_FILE = os.path.join(ROOT, "scripts", "data", "scoring_corpus.jsonl")
+STAGES = ["normalize", "alias", "splits", "embeddings", "llm", "fuse"]
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def load_corpus(path):
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def run(cases, concurrency, repeat):
+    # Imported here so OPENAI_BASE_URL / cache settings are in place first
+    from app.guesses.logic import get_similarity_score, build_song_context
+    from app.shared.timing import start_stage_timings
+    from app.shared import metrics
+
+    contexts = {}
+    for case in cases:
+        key = (case["title"], case["artist"])
+        if key not in contexts:
+            contexts[key] = await build_song_context({"id": f"{key}", "title": key[0], "artist": key[1]})
+
+    sem = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def one(case):
+        async with sem:
+            timings = start_stage_timings()
+            start = time.perf_counter()
+            song = {"title": case["title"], "artist": case["artist"]}
+            score = await get_similarity_score(case["guess"], song, contexts[(case["title"], case["artist"])])
+            results.append({**case, "score": score, "ms": (time.perf_counter() - start) * 1000, "stages": dict(timings)})
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await asyncio.gather(*[one(case) for case in cases])
+    wall = time.perf_counter() - started
+    tiers = {k.rsplit(".", 1)[1]: v for k, v in metrics.snapshot()["counters"].items() if k.startswith("scoring.resolved_by.")}
+    return results, wall, tiers
+
+
+def report(results, wall, tiers):
+    latencies = [r["ms"] for r in results]
+    print(f"guesses: {len(results)}  wall: {wall:.2f}s  throughput: {len(results) / wall:.1f} guesses/s")
+    print(f"latency ms  p50={_percentile(latencies, .5):.1f}  p95={_percentile(latencies, .95):.1f}  "
+          f"p99={_percentile(latencies, .99):.1f}  max={max(latencies):.1f}")
+
+    print("stage ms (guesses that reached the stage):")
+    for stage in STAGES:
+        values = [r["stages"][stage] for r in results if stage in r["stages"]]
+        if values:
+            print(f"  {stage:<11} n={len(values):<5} mean={statistics.mean(values):8.3f}  p95={_percentile(values, .95):8.3f}")
+
+    print("settled by tier: " + ", ".join(f"{k}={v}" for k, v in sorted(tiers.items())))
+
+    misses = [r for r in results if not (r["band"][0] <= r["score"] <= r["band"][1])]
+    print(f"accuracy vs expected bands: {1 - len(misses) / len(results):.1%} ({len(misses)} outside)")
+    by_label = {}
+    for r in results:
+        ok, total = by_label.get(r["label"], (0, 0))
+        by_label[r["label"]] = (ok + (r["band"][0] <= r["score"] <= r["band"][1]), total + 1)
+    for label, (ok, total) in sorted(by_label.items()):
+        print(f"  {label:<24} {ok}/{total}")
+    for r in misses[:20]:
+        print(f"  ✗ {r['title']} / {r['artist']} <- {r['guess']!r}: {r['score']} not in {r['band']}")
+    return misses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=CORPUS_FILE)
+    parser.add_argument("--base-url", help="OpenAI-compatible base URL; defaults to an in-process fake server")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="fake server mean latency")
+    parser.add_argument("--jitter-ms", type=float, default=30.0, help="fake server latency std deviation")
+    parser.add_argument("--slow-pct", type=float, default=0.0, help="fake server: fraction of slow requests")
+    parser.add_argument("--slow-ms", type=float, default=0.0, help="fake server: extra latency of slow requests")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1, help="repeats after the first pass hit the caches")
+    parser.add_argument("--json", help="also write per-guess results to this JSONL file")
+    args = parser.parse_args()
+
+    # Cold, isolated caches for every run (set before anything imports app.guesses)
+    os.environ["EMBED_CACHE_DIR"] = ""
+    if args.base_url:
+        os.environ["OPENAI_BASE_URL"] = args.base_url
+    else:
+        from fake_openai import start_in_background, free_port
+        port = free_port()
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "fake")
+        start_in_background(args.latency_ms, args.jitter_ms, port, slow_pct=args.slow_pct, slow_ms=args.slow_ms)
+
+    results, wall, tiers = asyncio.run(run(load_corpus(args.corpus), args.concurrency, args.repeat))
+    report(results, wall, tiers)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            for r in results:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Minimal stand-in for the two OpenAI endpoints the scorer uses, for benchmarks.
+
+- POST /v1/embeddings: local character n-gram hashing vectors (same as the
+  "local" embedding backend), so similarities still track spelling overlap.
+- POST /v1/chat/completions: reads the signals block out of the scorer's
+  prompt and answers with a deterministic score in the requested JSON shape.
+
+Both add a configurable latency (normal distribution, clipped at 0), plus an
+optional slow tail: a `slow_pct` fraction of requests takes `slow_ms` longer.
+
+    python scripts/fake_openai.py --port 8765 --latency-ms 150 --jitter-ms 50
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 ...
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+
+_SIGNAL = re.compile(r"^- (.+?): ([0-9.]+)$", re.MULTILINE)
+
+
+def create_fake_openai_app(
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    dim: int = 1536,
+    slow_pct: float = 0.0,
+    slow_ms: float = 0.0,
+) -> FastAPI:
+    # Imported lazily: app.guesses pulls in the OpenAI client, which must only be
+    # built after the caller has pointed OPENAI_BASE_URL at this server
+    from app.guesses.embeddings import HashingEmbeddingBackend
+
+    app = FastAPI(title="Fake OpenAI")
+    embedder = HashingEmbeddingBackend(dim=dim)
+
+    async def _delay():
+        delay = max(0.0, random.gauss(latency_ms, jitter_ms))
+        if slow_pct and random.random() < slow_pct:
+            delay += slow_ms
+        delay /= 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        await _delay()
+        vectors = await embedder.embed(texts)
+        return {
+            "object": "list",
+            "model": body.get("model"),
+            "data": [{"object": "embedding", "index": i, "embedding": v.tolist()} for i, v in enumerate(vectors)],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat(request: Request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        signals = {name: float(value) for name, value in _SIGNAL.findall(prompt)}
+        sims = [v for k, v in signals.items() if k.startswith("sim(")]
+        score = int(round(min(999.0, 1100 * max(sims or [0.0]))))
+        await _delay()
+        content = json.dumps({"match_type": "weak_relation", "score": score, "reason": "fake"})
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_in_background(latency_ms: float, jitter_ms: float, port: int = 0, slow_pct: float = 0.0, slow_ms: float = 0.0) -> str:
+    """Runs the fake server in a daemon thread and returns its base URL."""
+    port = port or free_port()
+    app = create_fake_openai_app(latency_ms, jitter_ms, slow_pct=slow_pct, slow_ms=slow_ms)
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--slow-pct", type=float, default=0.0, help="fraction of requests in the slow tail")
+    parser.add_argument("--slow-ms", type=float, default=0.0, help="extra latency of slow-tail requests")
+    args = parser.parse_args()
+    app = create_fake_openai_app(args.latency_ms, args.jitter_ms, slow_pct=args.slow_pct, slow_ms=args.slow_ms)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Offline re-scoring of historical guesses with the current scoring rules.
+
+Streams the `guesses` collection from Firestore in pages (ordered by
+document id), groups each page by song, resolves every song and its
+scoring context once, re-scores the distinct normalized guesses with one
+batched embedding call per group and a bounded worker pool, and appends
+a JSONL diff (old vs new score) to --out. Memory stays bounded: one page
+in flight, one prefetched, plus LRU caches of song contexts and scores.
+
+Progress is checkpointed after every page (last document id, counters and
+the output file size), so an interrupted run continues where it stopped:
+
+    python scripts/rescore_guesses.py --out rescore.jsonl
+    python scripts/rescore_guesses.py --out rescore.jsonl --resume
+
+Only changed scores are written unless --all is given.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.shared.cache import BoundedTTLCache  # noqa: E402
+from app.songs.model import get_song_by_id  # noqa: E402
+from app.guesses.model import guesses_ref  # noqa: E402
+from app.guesses.logic import score_guess, build_song_context, prefetch_embeddings, SongScoringContext  # noqa: E402
+from app.guesses.service import guess_cache_key  # noqa: E402
+
+_FIELDS = ["song_id", "guess", "guess_norm", "score"]
+
+
+class Checkpoint:
+    def __init__(self, path: str):
+        self.path = path
+        self.last_doc_id = None
+        self.processed = 0
+        self.changed = 0
+        self.flipped = 0  # crossed the 1000 (correct) line either way
+        self.skipped = 0  # song missing, scoring failed or degraded (no LLM)
+        self.abs_delta_total = 0
+        self.out_bytes = 0
+
+    def load(self) -> "Checkpoint":
+        with open(self.path, "r") as f:
+            self.__dict__.update({k: v for k, v in json.load(f).items() if k != "path"})
+        return self
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({k: v for k, v in self.__dict__.items() if k != "path"}, f)
+        os.replace(tmp, self.path)
+
+
+async def _pages(page_size: int, start_after, song_id=None):
+    """Yields lists of (doc id, data) in document id order."""
+    base = guesses_ref.where("song_id", "==", song_id) if song_id else guesses_ref
+    while True:
+        query = base.order_by("__name__").select(_FIELDS).limit(page_size)
+        if start_after:
+            query = query.start_after({"__name__": start_after})
+        page = [(doc.id, doc.to_dict()) async for doc in query.stream()]
+        if not page:
+            return
+        yield page
+        start_after = page[-1][0]
+
+
+async def _prefetching(pages, depth: int = 1):
+    """Fetches the next page(s) while the current one is being scored."""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+
+    async def produce():
+        try:
+            async for page in pages:
+                await queue.put(page)
+        finally:
+            await queue.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (page := await queue.get()) is not None:
+            yield page
+        await producer  # surfaces fetch errors
+    finally:
+        producer.cancel()
+
+
+class Rescorer:
+    def __init__(self, concurrency: int):
+        self.sem = asyncio.Semaphore(concurrency)
+        self.contexts = BoundedTTLCache("rescore_contexts", max_entries=256)
+        self.scores = BoundedTTLCache("rescore_scores", max_entries=100_000)
+
+    async def _song(self, song_id: str):
+        found = self.contexts.get(song_id)
+        if found is None:
+            try:
+                song = await get_song_by_id(song_id)
+            except Exception as e:
+                print(f"\nfetching song {song_id} failed: {e!r}", file=sys.stderr)
+                return None, None  # not remembered: a later page tries again
+            if song:
+                song = {**song, "id": song.get("id") or song_id}
+            found = (song, await self._context(song) if song else None)
+            self.contexts.set(song_id, found)
+        return found
+
+    async def _context(self, song: dict):
+        try:
+            return await build_song_context(song)
+        except Exception as e:
+            # Still scorable: each guess then embeds the references along with itself
+            print(f"\nembedding references of {song['id']} failed: {e!r}", file=sys.stderr)
+            return SongScoringContext.from_song(song)
+
+    async def _score(self, song_id: str, song: dict, context, guess: str):
+        async with self.sem:
+            try:
+                score, degraded = await score_guess(guess, song, context)
+            except Exception as e:
+                print(f"\nscoring failed for {song_id} / {guess!r}: {e!r}", file=sys.stderr)
+                return None
+            if degraded:
+                # Scored without the LLM: not a real score change, report it as skipped
+                print(f"\nLLM unavailable for {song_id} / {guess!r}, skipped", file=sys.stderr)
+                return None
+            return score
+
+    async def rescore_page(self, page):
+        """Returns [(doc id, data, guess key, new score or None)] for the page."""
+        by_song = {}
+        for doc_id, data in page:
+            by_song.setdefault(data.get("song_id"), []).append((doc_id, data))
+        page_scores = {}
+
+        async def group(song_id, rows):
+            song, context = await self._song(song_id) if song_id else (None, None)
+            if not song:
+                return  # song deleted or unavailable: its guesses are reported as not re-scored
+            todo = {}
+            for _, data in rows:
+                guess = data.get("guess") or ""
+                key = guess_cache_key(guess)
+                score = self.scores.get((song_id, key))
+                if score is None:
+                    todo.setdefault(key, guess)
+                else:
+                    page_scores[(song_id, key)] = score
+            try:
+                await prefetch_embeddings(list(todo.values()), context)
+            except Exception as e:
+                # Not fatal: each guess embeds (and fails, if it must) on its own in _score
+                print(f"\nbatch embedding for {song_id} failed: {e!r}", file=sys.stderr)
+            scores = await asyncio.gather(*[self._score(song_id, song, context, g) for g in todo.values()])
+            for key, score in zip(todo, scores):
+                if score is not None:
+                    page_scores[(song_id, key)] = score
+                    self.scores.set((song_id, key), score)
+
+        await asyncio.gather(*[group(song_id, rows) for song_id, rows in by_song.items()])
+
+        out = []
+        for doc_id, data in page:
+            key = guess_cache_key(data.get("guess") or "")
+            out.append((doc_id, data, key, page_scores.get((data.get("song_id"), key))))
+        return out
+
+
+async def run(args):
+    ckpt = Checkpoint(args.checkpoint)
+    if args.resume and os.path.exists(args.checkpoint):
+        ckpt.load()
+    # Drop anything written after the last checkpoint (a page that was cut off)
+    mode = "r+b" if args.resume and os.path.exists(args.out) else "wb"
+    out = open(args.out, mode)
+    out.truncate(ckpt.out_bytes)
+    out.seek(ckpt.out_bytes)
+
+    rescorer = Rescorer(args.concurrency)
+    started = time.perf_counter()
+    try:
+        async for page in _prefetching(_pages(args.page_size, ckpt.last_doc_id, args.song_id)):
+            for doc_id, data, key, new in await rescorer.rescore_page(page):
+                ckpt.processed += 1
+                old = data.get("score")
+                if new is None:
+                    ckpt.skipped += 1
+                    continue
+                delta = new - (old or 0)
+                if delta:
+                    ckpt.changed += 1
+                    ckpt.abs_delta_total += abs(delta)
+                    ckpt.flipped += (old == 1000) != (new == 1000)
+                if delta or args.all:
+                    row = {"id": doc_id, "song_id": data.get("song_id"), "guess": data.get("guess"), "key": key, "old": old, "new": new, "delta": delta}
+                    out.write((json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8"))
+            out.flush()
+            os.fsync(out.fileno())
+            ckpt.last_doc_id = page[-1][0]
+            ckpt.out_bytes = out.tell()
+            ckpt.save()
+            rate = ckpt.processed / max(time.perf_counter() - started, 1e-9)
+            print(f"\r{ckpt.processed} guesses  {ckpt.changed} changed  {ckpt.flipped} flipped  {rate:.0f}/s", end="", flush=True)
+    finally:
+        out.close()
+
+    print()
+    mean_delta = ckpt.abs_delta_total / ckpt.changed if ckpt.changed else 0
+    print(f"done: {ckpt.processed} guesses, {ckpt.changed} changed (mean |delta| {mean_delta:.1f}), "
+          f"{ckpt.flipped} crossed the correct line, {ckpt.skipped} skipped -> {args.out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="JSONL diff report")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <out>.ckpt.json)")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8, help="guesses scored at once")
+    parser.add_argument("--song-id", help="only guesses for this song")
+    parser.add_argument("--all", action="store_true", help="also write unchanged scores")
+    args = parser.parse_args()
+    args.checkpoint = args.checkpoint or f"{args.out}.ckpt.json"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
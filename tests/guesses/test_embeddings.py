@@ -0,0 +1,61 @@
+import asyncio
+from app.guesses.embeddings import EmbeddingCoalescer
+
+
+def recording_backend():
+    """Embeds each text to [len(text)] and records every batch it was called with."""
+    batches = []
+
+    async def embed_batch(texts):
+        batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    return embed_batch, batches
+
+
+async def test_requests_within_the_window_share_one_deduplicated_batch():
+    embed_batch, batches = recording_backend()
+    coalescer = EmbeddingCoalescer(embed_batch, window_ms=10, max_batch=100)
+
+    results = await asyncio.gather(
+        coalescer.embed(["queen", "abba"]),
+        coalescer.embed(["queen"]),
+        coalescer.embed(["toto", "abba"]),
+    )
+
+    assert batches == [["queen", "abba", "toto"]]
+    assert results == [[[5.0], [4.0]], [[5.0]], [[4.0], [4.0]]]
+
+
+async def test_flushes_as_soon_as_max_batch_texts_are_pending():
+    embed_batch, batches = recording_backend()
+    coalescer = EmbeddingCoalescer(embed_batch, window_ms=10_000, max_batch=3)
+
+    first = asyncio.ensure_future(coalescer.embed(["a", "bb"]))
+    second = asyncio.ensure_future(coalescer.embed(["ccc"]))
+
+    # Well before the 10 s window
+    assert await asyncio.wait_for(asyncio.gather(first, second), 1) == [[[1.0], [2.0]], [[3.0]]]
+    assert batches == [["a", "bb", "ccc"]]
+
+
+async def test_a_failed_batch_reaches_every_waiter():
+    calls = []
+
+    async def embed_batch(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise RuntimeError("upstream down")
+        return [[float(len(t))] for t in texts]
+
+    coalescer = EmbeddingCoalescer(embed_batch, window_ms=10, max_batch=100)
+
+    results = await asyncio.gather(
+        coalescer.embed(["queen"]),
+        coalescer.embed(["abba"]),
+        return_exceptions=True,
+    )
+
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    # The next batch goes out normally
+    assert await coalescer.embed(["toto"]) == [[4.0]]
@@ -0,0 +1,169 @@
+import numpy as np
+import pytest
+from app.guesses import logic
+from app.shared import metrics
+from app.shared.concurrency import AdaptiveConcurrencyLimiter
+from app.guesses.logic import _cosine_sims, _deterministic_signals, _alias_verdict, nlev, norm, SongScoringContext
+from app.guesses.logic import score_stages, get_similarity_score, score_guess, FINAL, PROVISIONAL, DEGRADED
+from app.guesses.embedding_cache import EmbeddingCache, unit_vector
+from app.guesses.embeddings import HashingEmbeddingBackend
+
+
+def test_cosine_sims_matches_naive_cosine():
+    rng = np.random.default_rng(0)
+    guess = rng.normal(size=16)
+    refs = rng.normal(size=(3, 16))
+    expected = [float(guess @ r / (np.linalg.norm(guess) * np.linalg.norm(r))) for r in refs]
+
+    sims = _cosine_sims(unit_vector(guess), np.stack([unit_vector(r) for r in refs]))
+
+    assert np.allclose(sims, expected, atol=1e-5)
+
+
+def test_embedding_cache_is_shared_through_disk(tmp_path):
+    writer = EmbeddingCache("model", 4, 8, str(tmp_path), 100)
+    reader = EmbeddingCache("model", 4, 8, str(tmp_path), 100)
+
+    assert reader.get("queen") is None
+    writer.put_many(["queen"], [[3.0, 0.0, 4.0, 0.0]])
+
+    assert np.allclose(reader.get("queen"), [0.6, 0.0, 0.8, 0.0])
+
+
+def test_embedding_cache_rollover_keeps_other_workers_mappings_valid(tmp_path):
+    dim = 256  # rows of ~1 KiB, so the old rows span several pages
+    vectors = [[1.0, float(i)] + [0.0] * (dim - 2) for i in range(50)]
+    writer = EmbeddingCache("model", dim, 0, str(tmp_path), 50)
+    reader = EmbeddingCache("model", dim, 0, str(tmp_path), 50)
+    writer.put_many([f"song {i}" for i in range(50)], vectors)
+    assert reader.get("song 0") is not None  # reader now maps and indexes the full file
+
+    writer.put_many(["queen"], [[3.0, 4.0] + [0.0] * (dim - 2)])  # full: starts a new file
+
+    # The old mapping is still readable (a truncate here used to SIGBUS the reader)
+    assert np.allclose(reader.get("song 40"), unit_vector(vectors[40]))
+    assert np.allclose(reader.get("queen")[:2], [0.6, 0.8])
+    assert reader.get("song 2") is None  # the new file replaced the old one
+    assert writer.get("song 3") is None
+
+
+def test_deterministic_signals_match_per_candidate_scoring():
+    det = _deterministic_signals(norm("Bohemian Rapsody by Quen"), ["bohemian rhapsody"], ["queen"])
+
+    assert det.saw_title_exact and not det.saw_artist_exact
+    assert det.best_title_dist == nlev("bohemian rapsody", "bohemian rhapsody")
+    assert det.best_artist_dist == nlev("quen", "queen")
+
+
+def test_deterministic_signals_never_match_empty_strings():
+    det = _deterministic_signals("queen", ["some title"], [""])
+
+    assert det.best_artist_dist == 1.0
+    assert not det.saw_artist_exact
+
+
+def test_alias_index_resolves_alternate_titles():
+    context = SongScoringContext.from_song({
+        "id": "1",
+        "title": "Don't Stop Me Now",
+        "artist": "Queen",
+        "aliases": ["Dont Stop Me Now"],
+    })
+
+    assert _alias_verdict(norm("dont stop me now"), context) == 1000
+    assert _alias_verdict(norm("DontStopMeNow by Queen"), context) == 1000
+    assert _alias_verdict(norm("Queen"), context) is None
+
+
+async def test_local_hashing_backend_is_deterministic_and_spelling_aware():
+    backend = HashingEmbeddingBackend(dim=256)
+    queen, quen, abba, again = [unit_vector(v) for v in await backend.embed(["queen", "quen", "abba", "queen"])]
+
+    assert np.array_equal(queen, again)
+    assert queen @ quen > queen @ abba
+
+
+async def test_fast_tiers_stream_a_single_final_score():
+    song = {"id": "s1", "title": "Bohemian Rhapsody", "artist": "Queen"}
+
+    assert [stage async for stage in score_stages("bohemian rhapsody!", song)] == [(FINAL, 1000)]
+    assert await get_similarity_score("Queen", song) == [score async for _, score in score_stages("Queen", song)][-1]
+
+
+@pytest.fixture
+def stub_models(monkeypatch):
+    """Reference strings embed to [1, 0]; guesses to whatever the test maps them to."""
+    vectors, llm_calls = {}, []
+
+    async def embed(texts):
+        return [np.array(vectors.get(t, [1.0, 0.0]), dtype=np.float32) for t in texts]
+
+    async def llm(*args):
+        llm_calls.append(args[0])
+        return 600
+
+    monkeypatch.setattr(logic, "_embed_texts", embed)
+    monkeypatch.setattr(logic, "_llm_score_or_none", llm)
+    return vectors, llm_calls
+
+
+@pytest.mark.parametrize("guess_vector, tier", [
+    ([0.0, 1.0], "embeddings"),  # clearly unrelated
+    ([1.0, 0.0], "embeddings"),  # clearly near
+    ([0.6, 0.8], "llm"),  # ambiguous
+])
+async def test_embedding_tier_resolves_clear_guesses_without_the_llm(stub_models, guess_vector, tier):
+    vectors, llm_calls = stub_models
+    guess = "a song by someone"  # far from title and artist by edit distance
+    vectors[guess] = guess_vector
+    song = {"id": "s1", "title": "Bohemian Rhapsody", "artist": "Queen"}
+    resolved = metrics.counter(f"scoring.resolved_by.{tier}")
+    before = resolved.value
+
+    score = await get_similarity_score(guess, song)
+
+    assert resolved.value == before + 1
+    assert llm_calls == ([guess] if tier == "llm" else [])
+    if guess_vector == [0.0, 1.0]:
+        assert score <= 200
+
+
+async def test_llm_fallback_ends_in_a_degraded_score(stub_models, monkeypatch):
+    vectors, _ = stub_models
+    vectors["a song by someone"] = [0.6, 0.8]
+    song = {"id": "s1", "title": "Bohemian Rhapsody", "artist": "Queen"}
+
+    async def no_llm(*args):
+        return None  # shed or timed out
+
+    monkeypatch.setattr(logic, "_llm_score_or_none", no_llm)
+
+    stages = [stage async for stage, _ in score_stages("a song by someone", song)]
+    assert stages == [PROVISIONAL, DEGRADED]
+    assert (await score_guess("a song by someone", song))[1] is True
+
+
+async def test_background_scoring_skips_the_llm_while_players_use_it(monkeypatch):
+    guess = "a song by someone"
+    song = {"id": "s1", "title": "Bohemian Rhapsody", "artist": "Queen"}
+    llm_calls = []
+
+    async def embed(texts):
+        return [np.array([0.6, 0.8] if t == guess else [1.0, 0.0], dtype=np.float32) for t in texts]
+
+    async def llm(*args):
+        llm_calls.append(args[0])
+        return 600
+
+    monkeypatch.setattr(logic, "_embed_texts", embed)
+    monkeypatch.setattr(logic, "_llm_score", llm)
+    monkeypatch.setattr(logic, "_llm_limiter", AdaptiveConcurrencyLimiter("test_background", initial_limit=1, max_limit=1))
+
+    async with logic._llm_limiter.slot():  # a player holds the only slot
+        with logic.background_scoring():
+            assert (await score_guess(guess, song))[1] is True
+        assert llm_calls == []
+
+    with logic.background_scoring():
+        assert (await score_guess(guess, song))[1] is False
+    assert llm_calls == [guess]
@@ -0,0 +1,129 @@
+import asyncio
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from app.guesses import logic, service
+from app.shared.exceptions import NoGuessesLeftException
+
+SONG = {"id": "song-1", "title": "Bohemian Rhapsody", "artist": "Queen"}
+# Stub embeddings: every reference string is [1, 0]; this guess has cosine 0.6 to them
+AMBIGUOUS_GUESS = "a song by someone"
+VECTORS = {AMBIGUOUS_GUESS: [0.6, 0.8]}
+
+
+@pytest.fixture
+def model_calls(monkeypatch):
+    calls = []
+
+    async def embed(texts):
+        calls.append(("embed", list(texts)))
+        return [np.array(VECTORS.get(t, [1.0, 0.0]), dtype=np.float32) for t in texts]
+
+    async def llm(*args):
+        calls.append(("llm",))
+        return 500
+
+    async def winner_song():
+        return SONG
+
+    async def no_history(user_id):
+        return []
+
+    monkeypatch.setattr(logic, "_embed_texts", embed)
+    monkeypatch.setattr(logic, "_llm_score_or_none", llm)
+    monkeypatch.setattr(service, "get_cached_winner_song", winner_song)
+    monkeypatch.setattr(service, "get_guesses", no_history)
+    monkeypatch.setattr(service, "peek_cached_guess", lambda song_id, guess_key: None)
+    return calls
+
+
+async def test_over_quota_guess_never_reaches_the_model_tiers(monkeypatch, model_calls):
+    async def over_quota_user(url, method="GET", body=None, params=None, headers=None):
+        await asyncio.sleep(0.01)  # the song and scoring are ready before the user is
+        return {"guesses": {service.datetime.utcnow().date().isoformat(): 99}, "is_subscribed": False}
+
+    monkeypatch.setattr(service, "call_internal_service", over_quota_user)
+    guess = "something else entirely"
+    assert logic.needs_models(guess, logic.SongScoringContext.from_song(SONG))
+
+    with pytest.raises(NoGuessesLeftException):
+        await service.make_guess("user-1", {"guess": guess})
+    await asyncio.sleep(0.05)
+
+    assert model_calls == []
+
+
+async def test_stream_reports_late_failures_as_an_error_event(monkeypatch, model_calls):
+    async def users_service(url, method="GET", body=None, params=None, headers=None):
+        if method == "PUT":
+            raise HTTPException(status_code=503, detail="users service unavailable")
+        return {"guesses": {}, "is_subscribed": False}
+
+    async def add_guess(*args):
+        pass
+
+    monkeypatch.setattr(service, "call_internal_service", users_service)
+    monkeypatch.setattr(service, "add_guess", add_guess)
+
+    events = [e async for e in await service.make_guess_stream("user-1", {"guess": "Bohemian Rhapsody"})]
+
+    assert events == [("error", {"detail": "users service unavailable", "status_code": 503})]
+
+
+async def test_concurrent_identical_streams_share_one_scoring_pass(monkeypatch, model_calls):
+    async def no_cached_score(song_id, guess_key):
+        return None, False
+
+    async def cache_guess(song_id, guess_key, score):
+        pass
+
+    async def slow_llm(*args):
+        model_calls.append(("llm",))
+        await asyncio.sleep(0.05)
+        return 500
+
+    monkeypatch.setattr(service, "get_cached_guess_of_today", no_cached_score)
+    monkeypatch.setattr(service, "cache_guess", cache_guess)
+    monkeypatch.setattr(service, "get_song_context", lambda song: None)
+    monkeypatch.setattr(logic, "_llm_score_or_none", slow_llm)
+
+    async def stream():
+        return [e async for e in service._score_stages_cached(AMBIGUOUS_GUESS, SONG)]
+
+    first, second = await asyncio.gather(stream(), stream())
+
+    assert model_calls.count(("llm",)) == 1
+    assert first[0][0] == service.PROVISIONAL and first[-1][0] == service.FINAL
+    assert second == [first[-1]]  # the second caller waits for the shared final
+
+
+async def test_degraded_scores_are_neither_cached_nor_shared(monkeypatch, model_calls):
+    cached, added = [], []
+
+    async def user(url, method="GET", body=None, params=None, headers=None):
+        return {"guesses": {}, "is_subscribed": False}
+
+    async def no_cached_score(song_id, guess_key):
+        return None, False
+
+    async def cache_guess(*args):
+        cached.append(args)
+
+    async def add_guess(*args):
+        added.append(args)
+
+    async def no_llm(*args):
+        return None  # shed or timed out
+
+    monkeypatch.setattr(service, "call_internal_service", user)
+    monkeypatch.setattr(service, "get_cached_guess_of_today", no_cached_score)
+    monkeypatch.setattr(service, "get_song_context", lambda song: None)
+    monkeypatch.setattr(service, "cache_guess", cache_guess)
+    monkeypatch.setattr(service, "add_guess", add_guess)
+    monkeypatch.setattr(logic, "_llm_score_or_none", no_llm)
+
+    response = await service.make_guess("user-1", {"guess": AMBIGUOUS_GUESS})
+
+    assert response.score is not None
+    assert cached == []
+    assert added[0][-1] is True  # recorded as degraded, out of other players' lookups
@@ -0,0 +1,72 @@
+import time
+from datetime import datetime, timezone
+from app.shared.cache import BoundedTTLCache, next_utc_midnight
+from app.shared.shared_cache import SharedCache
+
+
+def test_lru_eviction_by_count_and_bytes():
+    cache = BoundedTTLCache("test_lru", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    small = BoundedTTLCache("test_bytes", max_entries=100, max_bytes=1000)
+    for i in range(50):
+        small.set(("song", f"guess {i}"), i)
+    assert 0 < len(small) < 50
+    assert small.bytes <= 1000
+    assert small.get(("song", "guess 49")) == 49
+
+
+def test_entries_expire():
+    cache = BoundedTTLCache("test_expiry", max_entries=10)
+    cache.set("old", 1, expires_at=time.time() - 1)
+    cache.set("new", 2)
+    assert cache.get("old") is None
+    assert cache.get("new") == 2
+    assert len(cache) == 1
+
+    midnight = datetime.fromtimestamp(next_utc_midnight(), tz=timezone.utc)
+    assert (midnight.hour, midnight.minute, midnight.second) == (0, 0, 0)
+    assert 0 < next_utc_midnight() - time.time() <= 86400
+
+
+def test_workers_share_entries_through_the_host_cache(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a = BoundedTTLCache("test_shared", max_entries=10, shared=SharedCache(path))
+    worker_b = BoundedTTLCache("test_shared", max_entries=10, shared=SharedCache(path))
+
+    worker_a.set(("song-1", "bohemian rhapsody"), 1000)
+    worker_a.set(("song-1", "stale"), 5, expires_at=time.time() - 1)
+
+    assert worker_b.get(("song-1", "bohemian rhapsody")) == 1000
+    assert worker_b.get(("song-1", "stale")) is None
+    assert worker_b.get(("song-2", "bohemian rhapsody")) is None
+
+
+def test_claim_is_granted_once_until_it_expires(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a, worker_b = SharedCache(path), SharedCache(path)
+
+    assert worker_a.claim("job", "song-1", time.time() + 60)
+    assert not worker_b.claim("job", "song-1", time.time() + 60)
+    assert worker_b.claim("job", "song-2", time.time() + 60)
+
+    worker_a.claim("job", "song-3", time.time() - 1)  # already expired
+    assert worker_b.claim("job", "song-3", time.time() + 60)
+
+
+def test_prune_drops_expired_then_oldest_rows(tmp_path):
+    cache = SharedCache(str(tmp_path / "shared.sqlite3"), max_rows=2)
+    cache.set("ns", "expired", 0, time.time() - 1)
+    for i in range(3):
+        cache.set("ns", i, i, time.time() + 60)
+
+    cache.prune()
+
+    assert cache.get("ns", 0) is None
+    assert [cache.get("ns", i)[0] for i in (1, 2)] == [1, 2]
+    assert cache._connection().execute("SELECT count(*) FROM cache").fetchone()[0] == 2
@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from app.shared.concurrency import AdaptiveConcurrencyLimiter
+from app.shared.exceptions import ConcurrencyLimitExceededException
+
+
+async def test_limit_grows_on_fast_calls_and_backs_off_on_failures():
+    limiter = AdaptiveConcurrencyLimiter("test_aimd", initial_limit=4, max_limit=8, latency_target_ms=1000)
+
+    for _ in range(8):
+        async with limiter.slot():
+            pass
+    assert limiter.limit > 4
+
+    grown = limiter.limit
+    with pytest.raises(ValueError):
+        async with limiter.slot():
+            raise ValueError("upstream down")
+    assert limiter.limit == pytest.approx(grown * 0.7)
+    assert limiter.in_flight == 0
+
+
+async def test_sheds_when_queue_is_full_or_wait_times_out():
+    limiter = AdaptiveConcurrencyLimiter("test_shed", initial_limit=1, max_limit=1, max_queue=1)
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(limiter.acquire(queue_timeout=1))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ConcurrencyLimitExceededException):
+        await limiter.acquire()  # queue full
+    release.set()
+    await holder
+    await queued  # got the slot handed over
+    assert limiter.in_flight == 1
+
+    with pytest.raises(ConcurrencyLimitExceededException):
+        await limiter.acquire(queue_timeout=0.01)
+    assert not limiter._waiters
@@ -0,0 +1,32 @@
+import asyncio
+import pytest
+from app.shared import deadline
+from app.shared.hedging import Hedger
+
+
+async def test_slow_first_attempt_is_hedged_and_the_fast_one_wins():
+    hedger = Hedger("test_hedge_wins", initial_delay_ms=10)
+    delays = [1.0, 0.01]
+    cancelled = []
+
+    async def call():
+        delay = delays.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    assert await hedger.call(call) == 0.01
+    await asyncio.sleep(0)
+    assert cancelled == [1.0]
+
+
+async def test_timeout_is_capped_by_the_deadline():
+    hedger = Hedger("test_hedge_deadline", initial_delay_ms=10)
+    with deadline.deadline_after(0.02):
+        assert deadline.bounded(5) <= 0.02
+        with pytest.raises(asyncio.TimeoutError):
+            await hedger.call(lambda: asyncio.sleep(1), timeout=deadline.bounded(5))
+    assert deadline.remaining() is None
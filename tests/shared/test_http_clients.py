@@ -0,0 +1,13 @@
+from app.shared import http_clients
+
+
+async def test_client_is_reused_until_closed():
+    client = http_clients.get_client("test")
+    assert http_clients.get_client("test") is client
+    assert http_clients.pool_stats("test") == {"open": 0, "idle": 0, "in_use": 0, "queued": 0}
+
+    await http_clients.close_clients()
+    assert client.is_closed
+    assert http_clients.pool_stats("test") is None
+    assert http_clients.get_client("test") is not client
+    await http_clients.close_clients()
@@ -0,0 +1,23 @@
+import jwt
+from app.shared import http
+
+
+def test_internal_tokens_carry_identity_only_and_are_reused():
+    token = http.internal_auth_token("user-1")
+    assert http.internal_auth_token("user-1") == token
+    assert http.internal_auth_token("user-2") != token
+
+    claims = jwt.decode(token, options={"verify_signature": False})
+    assert set(claims) == {"iat", "exp", "service", "impersonated_user_id"}
+    assert claims["impersonated_user_id"] == "user-1"
+
+
+def test_verified_payloads_are_cached(monkeypatch):
+    token = http.internal_auth_token("user-3")
+    assert http.verify_internal_jwt(token)["impersonated_user_id"] == "user-3"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("decoded again")
+
+    monkeypatch.setattr(http.jwt, "decode", fail)
+    assert http.verify_internal_jwt(token)["impersonated_user_id"] == "user-3"
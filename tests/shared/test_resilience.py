@@ -0,0 +1,61 @@
+import time
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.middlewares.deadline import DeadlineMiddleware
+from app.shared import deadline
+from app.shared.resilience import CircuitBreaker, backoff_delay, CLOSED, OPEN, HALF_OPEN
+
+
+def test_breaker_opens_then_probes_once_and_closes(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=2, open_seconds=10)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.current_state() == OPEN
+    assert not breaker.allow()
+
+    now[0] += 10
+    assert breaker.current_state() == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.current_state() == OPEN
+
+    now[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.current_state() == CLOSED and breaker.failures == 0
+
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff_delay(5, 0.1, 1.0) for _ in range(200)]
+    assert all(0 <= d <= 1.0 for d in delays)
+    assert len(set(delays)) > 1
+
+
+async def test_deadline_header_is_only_honored_for_internal_callers():
+    app = FastAPI()
+
+    @app.get("/left")
+    async def left():
+        return {"left": deadline.remaining()}
+
+    async def fake_auth(request: Request, call_next):
+        request.state.auth_type = request.headers["x-auth-type"]
+        return await call_next(request)
+
+    app.add_middleware(DeadlineMiddleware)
+    app.add_middleware(BaseHTTPMiddleware, dispatch=fake_auth)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        internal = await client.get("/left", headers={"x-auth-type": "internal", deadline.DEADLINE_HEADER: "5000"})
+        user = await client.get("/left", headers={"x-auth-type": "user", deadline.DEADLINE_HEADER: "5000"})
+        spent = await client.get("/left", headers={"x-auth-type": "user", deadline.DEADLINE_HEADER: "0"})
+
+    assert 0 < internal.json()["left"] <= 5
+    assert user.json()["left"] is None
+    assert spent.status_code == 200
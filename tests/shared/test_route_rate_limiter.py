@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from app.middlewares.route_rate_limiter import rate_limited
+
+
+async def test_routes_sharing_a_scope_share_one_bucket():
+    @rate_limited(limit=2, window=60, scope="test_guesses")
+    async def guess(request):
+        return "ok"
+
+    @rate_limited(limit=2, window=60, scope="test_guesses")
+    async def guess_stream(request):
+        return "ok"
+
+    def request(path):
+        return SimpleNamespace(state=SimpleNamespace(user_id="u1"), url=SimpleNamespace(path=path), client=SimpleNamespace(host="127.0.0.1"))
+
+    assert await guess(request=request("/guesses")) == "ok"
+    assert await guess_stream(request=request("/guesses/stream")) == "ok"
+    with pytest.raises(HTTPException) as e:
+        await guess_stream(request=request("/guesses/stream"))
+    assert e.value.status_code == 429
@@ -0,0 +1,33 @@
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from app.shared.http import call_internal_service
+from app.shared.service_locator import register_local_services, resolve_local_service
+from app.shared.exceptions import SongNotFoundException
+
+
+async def test_local_calls_skip_http_and_match_its_results():
+    async def get_user(body, params):
+        return {"id": params["user_id"], "last_guess_date": datetime(2024, 1, 2, 3, 4, 5)}
+
+    async def get_item(body, params):
+        if params["item_id"] == "missing":
+            raise SongNotFoundException()
+        return {"id": params["item_id"]}
+
+    register_local_services({
+        ("GET", "/test-users"): get_user,
+        ("GET", "/test-items/{item_id}"): get_item,
+    })
+
+    assert await call_internal_service("/test-users", "GET", None, {"user_id": "u1"}) == {
+        "id": "u1",
+        "last_guess_date": "2024-01-02T03:04:05",
+    }
+    assert await call_internal_service("/test-items/42") == {"id": "42"}
+    with pytest.raises(HTTPException) as e:
+        await call_internal_service("/test-items/missing")
+    assert e.value.status_code == 404
+
+    assert resolve_local_service("PUT", "/test-users") is None
+    assert resolve_local_service("GET", "/test-items/1/extra") is None
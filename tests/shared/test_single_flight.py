@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from app.shared import deadline
+from app.shared.single_flight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test_share")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*[flight.do("k", work) for _ in range(5)])
+
+    assert results == [42] * 5
+    assert len(calls) == 1
+
+
+async def test_errors_and_timeouts_reach_every_waiter():
+    flight = SingleFlight("test_errors")
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("nope")
+
+    results = await asyncio.gather(*[flight.do("k", boom) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await flight.do("slow", lambda: asyncio.sleep(1), timeout=0.01)
+    # The key is released so the next caller runs again
+    assert await flight.do("slow", lambda: asyncio.sleep(0, result="ok")) == "ok"
+
+
+async def test_abandoned_work_is_cancelled_only_without_waiters():
+    flight = SingleFlight("test_abandon", cancel_abandoned=True)
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def work():
+        started.set()
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", work))
+    second = asyncio.ensure_future(flight.do("k", work))
+    await started.wait()
+    first.cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()  # the second caller still waits for it
+
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), 0.5)
+    assert await flight.do("k", lambda: asyncio.sleep(0, result="again")) == "again"
+
+
+async def test_shared_work_does_not_inherit_the_first_callers_deadline():
+    flight = SingleFlight("test_deadline")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return deadline.remaining()
+
+    with deadline.deadline_after(0.001):
+        first = asyncio.ensure_future(flight.do("k", work))
+    second = asyncio.ensure_future(flight.do("k", work))
+
+    assert await asyncio.gather(first, second) == [None, None]
+
+
+async def test_caller_arriving_after_abandonment_starts_fresh_work():
+    flight = SingleFlight("test_abandon_rejoin", cancel_abandoned=True)
+    started = asyncio.Event()
+
+    async def work():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", work))
+    await started.wait()
+    first.cancel()
+    await asyncio.sleep(0)  # first's cleanup cancels the abandoned run
+
+    assert await flight.do("k", work) == "done"